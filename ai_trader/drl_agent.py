@@ -1,18 +1,30 @@
-import torch
+import time
 import numpy as np
 import logging
 from utils import send_alert
 import asyncio
+from ai_trader.model_server import ModelServer
 
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
+ACTIONS = {0: 'hold', 1: 'buy', 2: 'sell'}
 
 class DRLTrader:
-    def __init__(self, model_path='models/drl_legend.pt', fallback_strategy='rule_based'):
-        self.model = None
+    def __init__(self, model_path='models/drl_legend.pt', fallback_strategy='rule_based', quantize=False,
+                 num_threads=1, warmup_iterations=20, watch_pattern=None, reload_interval=0,
+                 inference_mode='inline', inference_workers=1, inference_timeout=1.0, max_batch_rows=512,
+                 rsi_buy=30, rsi_sell=70):
         self.fallback_strategy = fallback_strategy
+        self.rsi_buy = rsi_buy
+        self.rsi_sell = rsi_sell
+        server_kwargs = dict(quantize=quantize, num_threads=num_threads, warmup_iterations=warmup_iterations,
+                             watch_pattern=watch_pattern, reload_interval=reload_interval)
+        if inference_mode == 'process':
+            from ai_trader.inference_worker import InferenceWorkerPool
+            self.server = InferenceWorkerPool(model_path, workers=inference_workers, max_rows=max_batch_rows,
+                                              timeout=inference_timeout, **server_kwargs)
+        else:
+            self.server = ModelServer(model_path, **server_kwargs)
         try:
-            self.model = torch.load(model_path, map_location='cpu')
-            self.model.eval()
+            self.server.load()
             logging.info(f"Loaded DRL model from {model_path}")
         except FileNotFoundError:
             logging.error(f"Model {model_path} not found. Using {fallback_strategy}.")
@@ -20,29 +32,51 @@ class DRLTrader:
         except Exception as e:
             logging.error(f"Error loading model: {e}. Using {fallback_strategy}.")
             asyncio.run(send_alert(f"Error loading model: {e}. Using {fallback_strategy}.", error=True))
+        self.server.start_watcher()
+
+    @property
+    def model(self):
+        return self.server.available
 
     def decide(self, features, symbol):
-        if self.model:
+        return self.decide_batch([features], [symbol])[0]
+
+    def decide_batch(self, features, symbols):
+        actions, confidence, size = self.decide_arrays(features)
+        return self._signals(actions, confidence, size, symbols)
+
+    def decide_arrays(self, features):
+        """Action codes (indexes into ACTIONS), confidences and sizes for every feature row."""
+        features = np.asarray(features, dtype=np.float32)
+        if self.server.available:
             try:
-                obs = torch.tensor(features, dtype=torch.float32).unsqueeze(0)
-                with torch.no_grad():
-                    output = self.model(obs)
-                action = int(torch.argmax(output).item())
-                side = {0: 'hold', 1: 'buy', 2: 'sell'}[action]
-                confidence = float(torch.softmax(output, dim=1).max().item())
-                size = min(1.0, confidence)
+                logits = self.server.predict(features)
+                exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+                probs = exp / exp.sum(axis=1, keepdims=True)
+                actions = probs.argmax(axis=1)
+                confidence = probs[np.arange(len(probs)), actions].astype(np.float64)
+                return actions, confidence, np.minimum(1.0, confidence)
             except Exception as e:
                 logging.error(f"DRL inference error: {e}. Using fallback.")
-                asyncio.run(send_alert(f"DRL inference error for {symbol}: {e}. Using fallback.", error=True))
-                side, confidence, size = self._rule_based_decision(features)
-        else:
-            side, confidence, size = self._rule_based_decision(features)
-        return {"side": side, "size": size, "confidence": confidence, "symbol": symbol}
-
-    def _rule_based_decision(self, features):
-        rsi = features[3]
-        if rsi > 70:
-            return 'sell', 0.7, 0.5
-        elif rsi < 30:
-            return 'buy', 0.7, 0.5
-        return 'hold', 0.5, 0.0
+                asyncio.run(send_alert(f"DRL inference error for {len(features)} rows: {e}. Using fallback.", error=True))
+        return self.fallback_arrays(features)
+
+    def fallback_batch(self, features, symbols):
+        actions, confidence, size = self.fallback_arrays(np.asarray(features, dtype=np.float32))
+        return self._signals(actions, confidence, size, symbols)
+
+    def fallback_arrays(self, features):
+        start = time.perf_counter()
+        rsi = features[:, 3]
+        actions = np.where(rsi > self.rsi_sell, 2, np.where(rsi < self.rsi_buy, 1, 0))
+        confidence = np.where(actions == 0, 0.5, 0.7)
+        size = np.where(actions == 0, 0.0, 0.5)
+        self.server.record_latency('fallback', time.perf_counter() - start, len(features))
+        return actions, confidence, size
+
+    def latency_report(self):
+        return self.server.latency_report()
+
+    def _signals(self, actions, confidence, size, symbols):
+        return [{"side": ACTIONS[a], "size": s, "confidence": c, "symbol": symbol}
+                for a, c, s, symbol in zip(actions.tolist(), confidence.tolist(), size.tolist(), symbols)]
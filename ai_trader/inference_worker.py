@@ -0,0 +1,211 @@
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from ai_trader.model_server import LatencyStats, ModelServer, N_FEATURES
+
+N_OUTPUTS = 3
+
+def _worker_main(conn, input_name, output_name, max_rows, server_kwargs):
+    input_shm, output_shm = shared_memory.SharedMemory(name=input_name), shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_rows, N_FEATURES), dtype=np.float32, buffer=input_shm.buf)
+    outputs = np.ndarray((max_rows, N_OUTPUTS), dtype=np.float32, buffer=output_shm.buf)
+    server = ModelServer(**server_kwargs)
+    try:
+        server.load()
+        server.start_watcher()
+        conn.send(('ready', server.loaded_path))
+    except Exception as e:
+        conn.send(('failed', str(e)))
+        return
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'infer':
+                rows = message[1]
+                try:
+                    outputs[:rows] = server.predict(inputs[:rows])
+                    conn.send(('ok', rows))
+                except Exception as e:
+                    conn.send(('error', str(e)))
+            elif message[0] == 'ping':
+                conn.send(('pong', server.loaded_path))
+            elif message[0] == 'stop':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del inputs, outputs
+        input_shm.close()
+        output_shm.close()
+
+class _Worker:
+    def __init__(self, index, max_rows):
+        self.index = index
+        self.input_shm = shared_memory.SharedMemory(create=True, size=max_rows * N_FEATURES * 4)
+        self.output_shm = shared_memory.SharedMemory(create=True, size=max_rows * N_OUTPUTS * 4)
+        self.inputs = np.ndarray((max_rows, N_FEATURES), dtype=np.float32, buffer=self.input_shm.buf)
+        self.outputs = np.ndarray((max_rows, N_OUTPUTS), dtype=np.float32, buffer=self.output_shm.buf)
+        self.process = None
+        self.conn = None
+        self.healthy = False
+        self.failures = 0
+        self.next_spawn = 0.0
+
+class InferenceWorkerPool:
+    def __init__(self, model_path, workers=1, max_rows=512, timeout=1.0, startup_timeout=60.0,
+                 health_interval=5.0, **server_kwargs):
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.server_kwargs = dict(server_kwargs, model_path=model_path)
+        self.latencies = LatencyStats()
+        self._context = mp.get_context('spawn')
+        self._workers = [_Worker(i, max_rows) for i in range(workers)]
+        self._idle = queue.Queue()
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    @property
+    def available(self):
+        return any(w.healthy for w in self._workers)
+
+    def load(self):
+        for worker in self._workers:
+            self._spawn(worker)
+        if not self.available:
+            raise RuntimeError("No inference worker could load the model")
+
+    def start_watcher(self):
+        self._health_thread = threading.Thread(target=self._health_loop, name='inference-health', daemon=True)
+        self._health_thread.start()
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32).reshape(-1, N_FEATURES)
+        start = time.perf_counter()
+        logits = np.empty((len(batch), N_OUTPUTS), dtype=np.float32)
+        for offset in range(0, len(batch), self.max_rows):
+            chunk = batch[offset:offset + self.max_rows]
+            logits[offset:offset + len(chunk)] = self._run_chunk(chunk)
+        self.record_latency('model', time.perf_counter() - start, len(batch))
+        return logits
+
+    def record_latency(self, path, seconds, batch_size):
+        self.latencies.record(path, seconds, batch_size)
+
+    def latency_report(self):
+        return self.latencies.report()
+
+    def close(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(self.timeout + 1.0)
+        for worker in self._workers:
+            self._terminate(worker, graceful=True)
+            worker.inputs = worker.outputs = None
+            for shm in (worker.input_shm, worker.output_shm):
+                shm.close()
+                shm.unlink()
+
+    def _run_chunk(self, chunk):
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("No healthy inference worker available")
+        rows = len(chunk)
+        try:
+            worker.inputs[:rows] = chunk
+            worker.conn.send(('infer', rows))
+            if not worker.conn.poll(self.timeout):
+                raise TimeoutError(f"Inference worker {worker.index} timed out after {self.timeout}s")
+            status, payload = worker.conn.recv()
+            if status != 'ok':
+                raise RuntimeError(f"Inference worker {worker.index} failed: {payload}")
+            result = worker.outputs[:rows].copy()
+        except Exception:
+            self._mark_unhealthy(worker)
+            raise
+        self._idle.put(worker)
+        return result
+
+    def _spawn(self, worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, worker.input_shm.name, worker.output_shm.name, self.max_rows, self.server_kwargs),
+            name=f'inference-worker-{worker.index}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn = process, parent_conn
+        if parent_conn.poll(self.startup_timeout):
+            try:
+                status, payload = parent_conn.recv()
+            except EOFError:
+                status, payload = 'failed', 'worker exited during startup'
+        else:
+            status, payload = 'failed', f'no response within {self.startup_timeout}s'
+        if status == 'ready':
+            worker.failures = 0
+            worker.healthy = True
+            self._idle.put(worker)
+            logging.info(f"Inference worker {worker.index} (pid {process.pid}) serving {payload}")
+        else:
+            logging.error(f"Inference worker {worker.index} failed to start: {payload}")
+            self._terminate(worker)
+            worker.failures += 1
+            worker.next_spawn = time.monotonic() + min(300.0, self.health_interval * 2 ** worker.failures)
+
+    def _mark_unhealthy(self, worker):
+        self._terminate(worker)
+        logging.error(f"Inference worker {worker.index} marked unhealthy; restarting on next health check")
+
+    def _terminate(self, worker, graceful=False):
+        if worker.process is None:
+            worker.healthy = False
+            return
+        if graceful and worker.process.is_alive():
+            try:
+                worker.conn.send(('stop',))
+                worker.process.join(1.0)
+            except (OSError, BrokenPipeError):
+                pass
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(1.0)
+        worker.conn.close()
+        worker.process = worker.conn = None
+        worker.healthy = False
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                for worker in self._workers:
+                    if not worker.healthy and worker.process is None and time.monotonic() >= worker.next_spawn:
+                        self._spawn(worker)
+                self._ping_idle()
+            except Exception as e:
+                logging.error(f"Inference worker health check error: {e}")
+
+    def _ping_idle(self):
+        for _ in range(self._idle.qsize()):
+            if self._stop.is_set():
+                return
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                worker.conn.send(('ping',))
+                if not worker.conn.poll(self.timeout) or worker.conn.recv()[0] != 'pong':
+                    raise TimeoutError("no pong")
+            except Exception as e:
+                logging.error(f"Inference worker {worker.index} failed health check: {e}")
+                self._mark_unhealthy(worker)
+                continue
+            self._idle.put(worker)
@@ -0,0 +1,171 @@
+import glob
+import logging
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+N_FEATURES = 12
+
+class LatencyStats:
+    def __init__(self, paths=('model', 'fallback'), maxlen=2000):
+        self.samples = {path: deque(maxlen=maxlen) for path in paths}
+
+    def record(self, path, seconds, batch_size):
+        self.samples[path].append((seconds, batch_size))
+
+    def report(self):
+        report = {}
+        for path, samples in self.samples.items():
+            samples = list(samples)
+            if not samples:
+                continue
+            ms = np.array([s for s, _ in samples]) * 1000
+            rows = sum(n for _, n in samples)
+            report[path] = {
+                'batches': len(samples),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'max_ms': float(ms.max()),
+                'us_per_row': float(ms.sum() * 1000 / max(rows, 1)),
+            }
+        return report
+
+class ModelServer:
+    def __init__(self, model_path, quantize=False, num_threads=1, warmup_iterations=20,
+                 watch_pattern=None, reload_interval=0, n_features=N_FEATURES):
+        self.model_path = model_path
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.warmup_iterations = warmup_iterations
+        self.watch_pattern = watch_pattern
+        self.reload_interval = reload_interval
+        self.n_features = n_features
+        self.loaded_path = None
+        self._loaded_stamp = None
+        self._runner = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.latencies = LatencyStats()
+
+    @property
+    def available(self):
+        return self._runner is not None
+
+    def load(self, path=None):
+        path = path or self.model_path
+        with self._reload_lock:
+            stamp = _file_stamp(path)
+            runner = self._build_runner(path)
+            self._warmup(runner)
+            self._runner = runner
+            self.loaded_path = path
+            self._loaded_stamp = stamp
+        logging.info(f"Serving DRL model from {path}")
+
+    def predict(self, batch):
+        runner = self._runner
+        if runner is None:
+            raise RuntimeError("No model loaded")
+        batch = np.ascontiguousarray(batch, dtype=np.float32).reshape(-1, self.n_features)
+        start = time.perf_counter()
+        logits = runner(batch)
+        self.record_latency('model', time.perf_counter() - start, len(batch))
+        return logits
+
+    def record_latency(self, path, seconds, batch_size):
+        self.latencies.record(path, seconds, batch_size)
+
+    def latency_report(self):
+        return self.latencies.report()
+
+    def start_watcher(self):
+        if self.reload_interval <= 0:
+            return
+        threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                candidate = self._candidate_path()
+                if candidate and self._is_newer(candidate):
+                    self.load(candidate)
+                    logging.info(f"Hot-reloaded DRL model from {candidate}")
+            except Exception as e:
+                logging.error(f"DRL model hot reload failed, keeping {self.loaded_path}: {e}")
+
+    def _is_newer(self, path):
+        if self._loaded_stamp is None:
+            return True
+        stamp = _file_stamp(path)
+        if path == self.loaded_path:
+            return stamp != self._loaded_stamp
+        return stamp[0] > self._loaded_stamp[0]
+
+    def _candidate_path(self):
+        if self.watch_pattern:
+            paths = glob.glob(self.watch_pattern)
+            if paths:
+                return max(paths, key=os.path.getmtime)
+        return self.model_path if os.path.exists(self.model_path) else None
+
+    def _build_runner(self, path):
+        if path.endswith('.onnx'):
+            return self._build_onnx_runner(path)
+        return self._build_torch_runner(path)
+
+    def _build_torch_runner(self, path):
+        import torch
+        torch.set_num_threads(self.num_threads)
+        try:
+            model = torch.jit.load(path, map_location='cpu')
+        except RuntimeError:
+            model = torch.load(path, map_location='cpu', weights_only=False)
+        model.eval()
+        if self.quantize:
+            if isinstance(model, torch.jit.ScriptModule):
+                logging.warning(f"Dynamic quantization is not supported for TorchScript model {path}; serving fp32")
+            else:
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        def run(batch):
+            with torch.inference_mode():
+                return model(torch.from_numpy(batch)).numpy()
+        return run
+
+    def _build_onnx_runner(self, path):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            # Optional dependency: only ONNX models need it, so it is not in requirements.txt.
+            raise RuntimeError(f"{path} is an ONNX model but onnxruntime is not installed; "
+                               f"run `pip install onnxruntime` or set model.path to a TorchScript .pt file") from e
+        if self.quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantized_path = path[:-len('.onnx')] + '.int8.onnx'
+            if not os.path.exists(quantized_path) or os.path.getmtime(quantized_path) < os.path.getmtime(path):
+                quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+            path = quantized_path
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+
+        def run(batch):
+            return session.run(None, {input_name: batch})[0]
+        return run
+
+    def _warmup(self, runner):
+        for rows in (1, 128):
+            batch = np.zeros((rows, self.n_features), dtype=np.float32)
+            for _ in range(self.warmup_iterations):
+                runner(batch)
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import time
+import torch
+from torch import nn
+from ai_trader.model_server import N_FEATURES
+from ai_trader.training_env import POSITIONS, VectorTradingEnv
+from strategy_engine import FEATURE_NAMES
+
+N_ACTIONS = 3
+
+class ActorCritic(nn.Module):
+    def __init__(self, mean, std, hidden=64, mask=None):
+        super().__init__()
+        self.register_buffer('mean', mean.clone())
+        self.register_buffer('std', std.clone())
+        self.register_buffer('mask', mask.clone() if mask is not None else torch.ones_like(mean))
+        self.body = nn.Sequential(nn.Linear(N_FEATURES, hidden), nn.Tanh(), nn.Linear(hidden, hidden), nn.Tanh())
+        self.policy = nn.Linear(hidden, N_ACTIONS)
+        self.value = nn.Linear(hidden, 1)
+
+    def forward(self, features):
+        hidden = self.body((features - self.mean) / self.std * self.mask)
+        return self.policy(hidden), self.value(hidden).squeeze(-1)
+
+class PolicyExport(nn.Module):
+    """Inference-only view of ActorCritic: raw feature rows in, action logits out. Features masked
+    out in training are zeroed after normalization here too."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.register_buffer('mean', model.mean.clone())
+        self.register_buffer('std', model.std.clone())
+        self.register_buffer('mask', model.mask.clone())
+        self.body = model.body
+        self.policy = model.policy
+
+    def forward(self, features):
+        features = torch.nan_to_num(features)
+        return self.policy(self.body((features - self.mean) / self.std * self.mask))
+
+def train(data, train_bounds, n_envs=1024, rollout=32, updates=500, lr=3e-4, gamma=0.99, gae_lambda=0.95,
+          entropy_coef=0.01, value_coef=0.5, cost_bps=3.0, hidden=64, seed=0, log_every=50):
+    """Advantage actor-critic over a VectorTradingEnv; every update uses n_envs x rollout transitions."""
+    torch.manual_seed(seed)
+    env = VectorTradingEnv(data, n_envs, day_bounds=train_bounds, cost_bps=cost_bps, seed=seed)
+    model = ActorCritic(data['mean'], data['std'], hidden, data.get('feature_mask'))
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    obs = env.reset()
+    start = time.perf_counter()
+    for update in range(1, updates + 1):
+        observations = torch.empty(rollout, n_envs, N_FEATURES)
+        actions = torch.empty(rollout, n_envs, dtype=torch.long)
+        rewards = torch.empty(rollout, n_envs)
+        dones = torch.empty(rollout, n_envs)
+        values = torch.empty(rollout + 1, n_envs)
+        with torch.no_grad():
+            for t in range(rollout):
+                logits, value = model(obs)
+                action = torch.distributions.Categorical(logits=logits).sample()
+                observations[t], actions[t], values[t] = obs, action, value
+                obs, rewards[t], done = env.step(action)
+                dones[t] = done.float()
+            values[rollout] = model(obs)[1]
+            advantages = torch.zeros(rollout, n_envs)
+            running = torch.zeros(n_envs)
+            for t in reversed(range(rollout)):
+                alive = 1.0 - dones[t]
+                delta = rewards[t] + gamma * values[t + 1] * alive - values[t]
+                running = delta + gamma * gae_lambda * alive * running
+                advantages[t] = running
+            targets = advantages + values[:rollout]
+
+        logits, value = model(observations.reshape(-1, N_FEATURES))
+        dist = torch.distributions.Categorical(logits=logits)
+        flat_advantages = advantages.reshape(-1)
+        flat_advantages = (flat_advantages - flat_advantages.mean()) / (flat_advantages.std() + 1e-8)
+        policy_loss = -(dist.log_prob(actions.reshape(-1)) * flat_advantages).mean()
+        value_loss = (value - targets.reshape(-1)).pow(2).mean()
+        entropy = dist.entropy().mean()
+        loss = policy_loss + value_coef * value_loss - entropy_coef * entropy
+        optimizer.zero_grad()
+        loss.backward()
+        nn.utils.clip_grad_norm_(model.parameters(), 0.5)
+        optimizer.step()
+        if update % log_every == 0 or update == updates:
+            steps = update * rollout * n_envs
+            logging.info(f"update {update}/{updates}: reward/step {rewards.mean():.3f}bps entropy {entropy:.3f} "
+                         f"value loss {value_loss:.3f} ({steps / (time.perf_counter() - start):,.0f} steps/s)")
+    return model
+
+@torch.no_grad()
+def evaluate(model, data, bounds, cost_bps=3.0):
+    """Greedy policy over every symbol and session in bounds, all stepped at once."""
+    policy = PolicyExport(model).eval()
+    features, returns, valid = data['features'], data['returns'], data['valid']
+    positions = torch.tensor(POSITIONS, dtype=torch.float32)
+    session_pnl, trades = [], 0
+    for first, end in bounds.tolist():
+        window = features[:, first:end]
+        target = positions[policy(window.reshape(-1, N_FEATURES)).argmax(-1)].reshape(window.shape[:2])
+        target = torch.where(valid[:, first:end], target, torch.zeros_like(target))
+        target[:, -1] = 0.0
+        held = torch.cat([torch.zeros(len(target), 1), target[:, :-1]], dim=1)
+        turnover = (target - held).abs()
+        pnl = held * returns[:, first:end] * 10000.0 - cost_bps * turnover
+        session_pnl.append(pnl.sum(dim=1))
+        trades += int(((turnover > 0) & (held != 0)).sum())
+    if not session_pnl:
+        return {'sessions': 0, 'mean_bps': 0.0, 'hit_rate': 0.0, 'trades': 0}
+    pnl = torch.cat(session_pnl)
+    return {
+        'sessions': len(pnl),
+        'mean_bps': float(pnl.mean()),
+        'hit_rate': float((pnl > 0).float().mean()),
+        'trades': trades,
+    }
+
+def export_model(model, path):
+    """Write a TorchScript policy that ModelServer serves as-is; normalization and the feature mask
+    are baked in and listed in the file's metadata.json."""
+    scripted = torch.jit.script(PolicyExport(model).eval())
+    mask = model.mask.tolist()
+    masked = [name for name, keep in zip(FEATURE_NAMES, mask) if not keep]
+    metadata = {'features': list(FEATURE_NAMES), 'feature_mask': mask, 'masked_features': masked}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # The .tmp suffix keeps the hot-reload glob from picking up a half-written file.
+    tmp_path = f'{path}.tmp'
+    scripted.save(tmp_path, _extra_files={'metadata.json': json.dumps(metadata)})
+    os.replace(tmp_path, path)
+    logging.info(f"Exported DRL policy to {path}" + (f" with {', '.join(masked)} masked out" if masked else ""))
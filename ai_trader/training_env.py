@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+import pandas as pd
+import torch
+from strategy_engine import FEATURE_NAMES
+
+POSITIONS = (0, 1, -1)  # hold keeps the book flat, buy goes long, sell goes short; indexed like drl_agent.ACTIONS
+
+def build_training_data(df, exit_time='15:15'):
+    """Turn the long minute history into symbol x time tensors laid out like build_feature_matrix rows."""
+    df = df.sort_values(['symbol', 'timestamp']).copy()
+    # Live ticks carry the exchange's cumulative day volume, not per-minute volume.
+    df['volume'] = df.groupby(['symbol', df['timestamp'].dt.date])['volume'].cumsum()
+    timestamps = pd.DatetimeIndex(sorted(df['timestamp'].unique()))
+    symbols = sorted(df['symbol'].unique())
+    missing = [name for name in FEATURE_NAMES if name not in df.columns or df[name].isna().all()]
+    if missing:
+        logging.warning(f"History has no {', '.join(missing)} data; those features are masked out of the policy")
+
+    features = np.zeros((len(symbols), len(timestamps), len(FEATURE_NAMES)), dtype=np.float32)
+    for column, name in enumerate(FEATURE_NAMES):
+        if name in df.columns:
+            frame = df.pivot_table(index='timestamp', columns='symbol', values=name).reindex(index=timestamps, columns=symbols)
+            features[:, :, column] = frame.ffill().to_numpy().T
+    close = df.pivot_table(index='timestamp', columns='symbol', values='close').reindex(index=timestamps, columns=symbols)
+    close = close.ffill().to_numpy().T
+    returns = np.zeros_like(close)
+    returns[:, 1:] = np.nan_to_num(close[:, 1:] / close[:, :-1] - 1.0, nan=0.0, posinf=0.0, neginf=0.0)
+
+    valid = ~np.isnan(features).any(axis=2)
+    mean = np.nanmean(features.reshape(-1, len(FEATURE_NAMES)), axis=0)
+    std = np.nanstd(features.reshape(-1, len(FEATURE_NAMES)), axis=0)
+    features = np.where(np.isnan(features), mean, features)
+
+    hours, minutes = map(int, exit_time.split(':'))
+    tradable = (timestamps.hour * 60 + timestamps.minute).to_numpy() <= hours * 60 + minutes
+    days = pd.factorize(timestamps.normalize())[0]
+    bounds = []
+    for day in range(days.max() + 1 if len(days) else 0):
+        steps = np.flatnonzero((days == day) & tradable)
+        if len(steps) > 1:
+            bounds.append((steps[0], steps[-1] + 1))
+    return {
+        'symbols': symbols,
+        'features': torch.from_numpy(features),
+        'returns': torch.from_numpy(returns.astype(np.float32)),
+        'valid': torch.from_numpy(valid),
+        'day_bounds': torch.tensor(bounds, dtype=torch.long).reshape(-1, 2),
+        'mean': torch.from_numpy(np.nan_to_num(mean).astype(np.float32)),
+        'std': torch.from_numpy(np.where(np.nan_to_num(std) > 0, np.nan_to_num(std), 1.0).astype(np.float32)),
+        # Features the history never had were trained at 0; live values for them must not reach the policy.
+        'feature_mask': torch.tensor([name not in missing for name in FEATURE_NAMES], dtype=torch.float32),
+    }
+
+class VectorTradingEnv:
+    """Many single-symbol, single-session episodes stepped together.
+
+    Each environment trades one symbol through one day: it sees the 12-feature row for
+    the current minute, picks hold/buy/sell and earns the next minute's return on the
+    resulting position (in basis points) less costs. Positions are closed at the exit
+    time and the environment restarts on a random symbol and day.
+    """
+
+    def __init__(self, data, n_envs, day_bounds=None, cost_bps=3.0, seed=0):
+        self.features = data['features']
+        self.returns = data['returns']
+        self.valid = data['valid']
+        self.day_bounds = data['day_bounds'] if day_bounds is None else day_bounds
+        if len(self.day_bounds) == 0:
+            raise ValueError("No trading sessions to train on")
+        self.n_envs = n_envs
+        self.cost = cost_bps
+        self.generator = torch.Generator().manual_seed(seed)
+        self.n_symbols = self.features.shape[0]
+        self.symbol = torch.zeros(n_envs, dtype=torch.long)
+        self.step_index = torch.zeros(n_envs, dtype=torch.long)
+        self.end = torch.zeros(n_envs, dtype=torch.long)
+        self.position = torch.zeros(n_envs)
+        self._positions = torch.tensor(POSITIONS, dtype=torch.float32)
+
+    def reset(self):
+        self._restart(torch.ones(self.n_envs, dtype=torch.bool))
+        return self.observe()
+
+    def observe(self):
+        return self.features[self.symbol, self.step_index]
+
+    def step(self, actions):
+        target = self._positions[actions]
+        next_index = self.step_index + 1
+        reward = target * self.returns[self.symbol, next_index] * 10000.0
+        reward -= self.cost * (target - self.position).abs()
+        # Rows still inside the indicator warm-up are never traded.
+        reward = torch.where(self.valid[self.symbol, self.step_index], reward, torch.zeros_like(reward))
+        self.position = target
+        self.step_index = next_index
+        done = self.step_index >= self.end - 1
+        reward = reward - torch.where(done, self.cost * self.position.abs(), torch.zeros_like(reward))
+        if done.any():
+            self._restart(done)
+        return self.observe(), reward, done
+
+    def _restart(self, mask):
+        count = int(mask.sum())
+        sessions = self.day_bounds[torch.randint(len(self.day_bounds), (count,), generator=self.generator)]
+        self.symbol[mask] = torch.randint(self.n_symbols, (count,), generator=self.generator)
+        self.step_index[mask] = sessions[:, 0]
+        self.end[mask] = sessions[:, 1]
+        self.position[mask] = 0.0
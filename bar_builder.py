@@ -0,0 +1,240 @@
+import csv
+import logging
+import os
+import threading
+from datetime import datetime, time, timedelta
+import numpy as np
+import pandas as pd
+
+TIMEFRAMES = {'1m': 60, '5m': 300, '15m': 900}
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+class BarSeries:
+    def __init__(self, capacity):
+        self.data = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self.count = 0
+
+    def append(self, bar):
+        self.data[self.count % len(self.data)] = bar
+        self.count += 1
+
+    def last(self, n=None):
+        capacity = len(self.data)
+        size = min(self.count, capacity)
+        n = size if n is None else min(n, size)
+        end = self.count % capacity
+        idx = np.arange(end - n, end) % capacity
+        return self.data[idx]
+
+class BarBuilder:
+    def __init__(self, timeframes=('1m', '5m', '15m'), capacity=240, session_start='09:15', session_end='15:30'):
+        self.timeframes = {tf: TIMEFRAMES[tf] for tf in timeframes}
+        self.capacity = capacity
+        self.session_start = time(*map(int, session_start.split(':')))
+        self.session_end = time(*map(int, session_end.split(':')))
+        self._series = {}
+        self._forming = {}
+        self._last_volume = {}
+        self._session_day = None
+        self._subscribers = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def update(self, symbol, price, cumulative_volume, timestamp=None):
+        timestamp = timestamp or datetime.now()
+        closed = []
+        with self._lock:
+            if not self._in_session(timestamp, closed):
+                return self._publish(closed)
+            previous = self._last_volume.get(symbol)
+            volume = max(0.0, cumulative_volume - previous) if previous is not None else 0.0
+            self._last_volume[symbol] = cumulative_volume
+            self._apply(symbol, timestamp, price, price, price, price, volume, closed)
+        self._publish(closed)
+
+    def update_ticks(self, ticks, timestamp=None):
+        timestamp = timestamp or datetime.now()
+        for symbol, tick in ticks.items():
+            self.update(symbol, tick['close'], tick.get('volume', 0.0), timestamp)
+        self.close_elapsed(timestamp)
+
+    def seed(self, symbol, frame):
+        """Load historical minute bars. The session day follows the last seeded bar, so live updates
+        on that day continue its forming bars. A symbol that already has bars, e.g. restored from a
+        checkpoint, is backfilled: each timeframe rebuilds its forming bar and takes only later rows."""
+        closed = []
+        with self._lock:
+            rows = [(pd.Timestamp(row.date).tz_localize(None).to_pydatetime(), row) for row in frame.itertuples(index=False)]
+            rows = [(ts, row) for ts, row in rows if self.session_start <= ts.time() < self.session_end]
+            if not rows:
+                return
+            resume = {tf: self._resume_from(symbol, tf) for tf in self.timeframes}
+            for tf, start in resume.items():
+                forming = self._forming.get((symbol, tf))
+                if forming is not None and rows[-1][0].timestamp() >= forming[TS]:
+                    del self._forming[(symbol, tf)]
+            for ts, row in rows:
+                stamp = ts.timestamp()
+                timeframes = [tf for tf, start in resume.items() if start is None or stamp >= start]
+                if timeframes:
+                    self._apply(symbol, ts, row.open, row.high, row.low, row.close, row.volume, closed, timeframes)
+            day = rows[-1][0].date()
+            if self._session_day is None or day > self._session_day:
+                self._session_day = day
+            elif day < self._session_day:
+                for tf in self.timeframes:
+                    if (symbol, tf) in self._forming:
+                        self._close((symbol, tf), closed)
+
+    def resume_time(self, symbol, timeframe=None):
+        """Start of the earliest bar `seed` would rebuild for `symbol` (one timeframe, or all), or None without bars."""
+        with self._lock:
+            starts = [self._resume_from(symbol, tf) for tf in ([timeframe] if timeframe else self.timeframes)]
+        starts = [start for start in starts if start is not None]
+        return datetime.fromtimestamp(min(starts)) if starts else None
+
+    def close_elapsed(self, now=None):
+        now = now or datetime.now()
+        closed = []
+        with self._lock:
+            if self._in_session(now, closed):
+                cutoff = now.timestamp()
+                for key, bar in list(self._forming.items()):
+                    if bar[TS] + self.timeframes[key[1]] <= cutoff:
+                        self._close(key, closed)
+        self._publish(closed)
+
+    def bars(self, symbol, timeframe, n=None):
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            return series.last(n).copy() if series else np.empty((0, len(FIELDS)))
+
+    def bar_frame(self, symbol, timeframe, n=None):
+        frame = pd.DataFrame(self.bars(symbol, timeframe, n), columns=FIELDS)
+        frame['timestamp'] = frame['timestamp'].map(datetime.fromtimestamp)
+        return frame
+
+    def bar_count(self, symbol, timeframe):
+        series = self._series.get((symbol, timeframe))
+        return series.count if series else 0
+
+    def state(self):
+        with self._lock:
+            return {
+                'series': {key: series.last().copy() for key, series in self._series.items()},
+                'forming': {key: bar.copy() for key, bar in self._forming.items()},
+                'last_volume': dict(self._last_volume),
+                'session_day': self._session_day,
+            }
+
+    def restore(self, state):
+        with self._lock:
+            for key, rows in state['series'].items():
+                if key[1] not in self.timeframes:
+                    continue
+                rows = rows[-self.capacity:]
+                series = self._series[key] = BarSeries(self.capacity)
+                series.data[:len(rows)] = rows
+                series.count = len(rows)
+            self._forming.update({key: bar.copy() for key, bar in state['forming'].items() if key[1] in self.timeframes})
+            self._last_volume.update(state['last_volume'])
+            self._session_day = state['session_day']
+
+    def _in_session(self, timestamp, closed):
+        day = timestamp.date()
+        if self._session_day != day:
+            self._close_all(closed)
+            self._last_volume.clear()
+            self._session_day = day
+        if timestamp.time() >= self.session_end:
+            self._close_all(closed)
+            return False
+        return timestamp.time() >= self.session_start
+
+    def _resume_from(self, symbol, timeframe):
+        forming = self._forming.get((symbol, timeframe))
+        if forming is not None:
+            return forming[TS]
+        series = self._series.get((symbol, timeframe))
+        if series is None or not series.count:
+            return None
+        return series.last(1)[0][TS] + self.timeframes[timeframe]
+
+    def _apply(self, symbol, timestamp, open_, high, low, close, volume, closed, timeframes=None):
+        origin = datetime.combine(timestamp.date(), self.session_start)
+        elapsed = (timestamp - origin).total_seconds()
+        for tf in timeframes or self.timeframes:
+            seconds = self.timeframes[tf]
+            key = (symbol, tf)
+            bucket = (origin + timedelta(seconds=elapsed // seconds * seconds)).timestamp()
+            bar = self._forming.get(key)
+            if bar is not None and bar[TS] != bucket:
+                self._close(key, closed)
+                bar = None
+            if bar is None:
+                self._forming[key] = np.array([bucket, open_, high, low, close, volume], dtype=np.float64)
+                continue
+            bar[HIGH] = max(bar[HIGH], high)
+            bar[LOW] = min(bar[LOW], low)
+            bar[CLOSE] = close
+            bar[VOLUME] += volume
+
+    def _close(self, key, closed):
+        bar = self._forming.pop(key)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = BarSeries(self.capacity)
+        series.append(bar)
+        closed.append((key[0], key[1], bar))
+
+    def _close_all(self, closed):
+        for key in list(self._forming):
+            self._close(key, closed)
+
+    def _publish(self, closed):
+        for symbol, timeframe, bar in closed:
+            for callback in self._subscribers:
+                try:
+                    callback(symbol, timeframe, bar)
+                except Exception as e:
+                    logging.error(f"Bar subscriber error for {symbol} {timeframe}: {e}")
+
+class CsvBarStore:
+    def __init__(self, base_dir='data/bars', flush_every=500, suffix=''):
+        self.base_dir = base_dir
+        self.suffix = suffix
+        self.flush_every = flush_every
+        self._pending = {}
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, timeframe, bar):
+        day = datetime.fromtimestamp(bar[TS]).strftime('%Y-%m-%d')
+        with self._lock:
+            rows = self._pending.setdefault((timeframe, day), [])
+            rows.append([datetime.fromtimestamp(bar[TS]).isoformat(), symbol, *bar[OPEN:].tolist()])
+            self._pending_rows += 1
+            if self._pending_rows >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        for (timeframe, day), rows in self._pending.items():
+            if not rows:
+                continue
+            path = os.path.join(self.base_dir, timeframe, f'{day}{self.suffix}.csv')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            new_file = not os.path.exists(path)
+            with open(path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['timestamp', 'symbol', *FIELDS[1:]])
+                writer.writerows(rows)
+        self._pending.clear()
+        self._pending_rows = 0
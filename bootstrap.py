@@ -0,0 +1,77 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+startup_timings = {}
+
+def _load_config():
+    from utils import get_config
+    return get_config()
+
+def _load_kite():
+    from kite_api_config import get_kite
+    return get_kite()
+
+def _load_excluded_stocks():
+    from utils import get_excluded_stocks
+    return get_excluded_stocks()
+
+def _load_symbols():
+    from data_fetcher import get_universe_symbols
+    return get_universe_symbols()
+
+def _load_sector_index():
+    from sector_index import get_sector_index
+    return get_sector_index()
+
+def _load_drl_trader():
+    from ai_trader.drl_agent import DRLTrader
+    from utils import get_config
+    model_config = get_config().get('model', {})
+    strategy_config = get_config().get('strategy', {})
+    return DRLTrader(
+        model_path=model_config.get('path', 'models/drl_legend.pt'),
+        quantize=model_config.get('quantize', False),
+        num_threads=model_config.get('num_threads', 1),
+        warmup_iterations=model_config.get('warmup_iterations', 20),
+        watch_pattern=model_config.get('watch_pattern'),
+        reload_interval=model_config.get('reload_interval', 0),
+        inference_mode=model_config.get('inference_mode', 'inline'),
+        inference_workers=model_config.get('inference_workers', 1),
+        inference_timeout=model_config.get('inference_timeout', 1.0),
+        max_batch_rows=model_config.get('max_batch_rows', 512),
+        rsi_buy=strategy_config.get('rsi_buy', 30),
+        rsi_sell=strategy_config.get('rsi_sell', 70)
+    )
+
+STARTUP_COMPONENTS = {
+    'config': _load_config,
+    'kite': _load_kite,
+    'excluded_stocks': _load_excluded_stocks,
+    'symbols': _load_symbols,
+    'sector_index': _load_sector_index,
+    'drl_trader': _load_drl_trader,
+}
+
+def _timed(name, loader):
+    start = time.perf_counter()
+    try:
+        return loader()
+    finally:
+        startup_timings[name] = time.perf_counter() - start
+
+def bootstrap(components=None, max_workers=4):
+    names = list(components or STARTUP_COMPONENTS)
+    start = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(_timed, name, STARTUP_COMPONENTS[name]) for name in names}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logging.error(f"Startup component {name} failed: {e}")
+                results[name] = None
+    startup_timings['total'] = time.perf_counter() - start
+    logging.info("Startup timings: " + ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in startup_timings.items()))
+    return results
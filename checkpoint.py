@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import pickle
+import struct
+import time
+import zlib
+from datetime import date, datetime
+from utils import get_config, send_alert, session_now
+
+CHECKPOINT_MAGIC = b'TACK'
+CHECKPOINT_VERSION = 1
+_HEADER = struct.Struct('>4sHd')
+
+def checkpoint_path(suffix=''):
+    path = get_config().get('checkpoint', {}).get('path', 'data/checkpoint/state.bin')
+    root, ext = os.path.splitext(path)
+    return f'{root}{suffix}{ext}'
+
+def collect_state(include_bars=True, include_portfolio=True):
+    import copy
+    import data_fetcher
+    import global_context
+    with global_context._context_lock:
+        context = copy.deepcopy(global_context.last_known_context)
+    state = {'session_day': date.today().isoformat(), 'global_context': context}
+    if include_bars:
+        state['bars'] = data_fetcher.get_bar_builder().state()
+        state['bar_indicators'] = dict(data_fetcher.bar_indicators)
+        state['seeded_symbols'] = set(data_fetcher.seeded_symbols)
+    if include_portfolio:
+        from portfolio import get_ledger
+        from signal_state import get_signal_tracker
+        ledger = get_ledger()
+        ledger.expire_pending(get_config().get('checkpoint', {}).get('pending_order_ttl', 300))
+        state['ledger'] = ledger.state()
+        state['signals'] = get_signal_tracker().state()
+    return state
+
+def save_checkpoint(path=None, include_bars=True, include_portfolio=True):
+    path = path or checkpoint_path()
+    try:
+        start = time.perf_counter()
+        payload = zlib.compress(pickle.dumps(collect_state(include_bars, include_portfolio), protocol=pickle.HIGHEST_PROTOCOL), 1)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, time.time()))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        logging.debug(f"Checkpoint of {len(payload)} bytes written to {path} in {(time.perf_counter() - start) * 1000:.0f}ms")
+    except Exception as e:
+        logging.error(f"Error writing checkpoint {path}: {e}")
+        asyncio.run(send_alert(f"Error writing checkpoint {path}: {e}", error=True))
+
+def load_checkpoint(path=None):
+    path = path or checkpoint_path()
+    max_age = get_config().get('checkpoint', {}).get('max_age', 3600)
+    try:
+        with open(path, 'rb') as f:
+            magic, version, saved_at = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+                logging.warning(f"Ignoring checkpoint {path}: unknown format")
+                return None
+            age = time.time() - saved_at
+            if age > max_age:
+                logging.info(f"Ignoring checkpoint {path}: {age:.0f}s old")
+                return None
+            state = pickle.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"Error reading checkpoint {path}: {e}")
+        return None
+    if state.get('session_day') != date.today().isoformat():
+        logging.info(f"Ignoring checkpoint {path} from session {state.get('session_day')}")
+        return None
+    return state
+
+def restore_checkpoint(path=None, reconcile=True):
+    """Warm-start from the last snapshot; returns True when one was applied."""
+    path = path or checkpoint_path()
+    start = time.perf_counter()
+    state = load_checkpoint(path)
+    if state is None:
+        return False
+    import data_fetcher
+    import global_context
+    with global_context._context_lock:
+        global_context.last_known_context.update(state['global_context'])
+    stale = ()
+    if 'bars' in state:
+        builder = data_fetcher.get_bar_builder()
+        builder.restore(state['bars'])
+        data_fetcher.bar_indicators.update(state['bar_indicators'])
+        # Symbols whose bars stop before the current minute are left for seed_bars to backfill.
+        cutoff = session_now().replace(second=0, microsecond=0)
+        timeframe = min(builder.timeframes, key=builder.timeframes.get)
+        stale = {symbol for symbol in state['seeded_symbols']
+                 if (builder.resume_time(symbol, timeframe) or datetime.min) < cutoff}
+        data_fetcher.seeded_symbols.update(state['seeded_symbols'] - stale)
+    if 'ledger' in state:
+        from portfolio import get_ledger
+        ledger = get_ledger()
+        ledger.restore(state['ledger'])
+        if reconcile:
+            reconcile_positions(ledger)
+    if 'signals' in state:
+        from signal_state import get_signal_tracker
+        get_signal_tracker().restore(state['signals'])
+    logging.info(f"Restored checkpoint {path} ({len(state.get('seeded_symbols', ()))} symbols, "
+                 f"{len(stale)} to backfill) in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return True
+
+def reconcile_positions(ledger):
+    from kite_api_config import get_kite
+    try:
+        mismatched = ledger.reconcile(get_kite())
+        if mismatched:
+            logging.warning(f"Positions differed from broker for {', '.join(mismatched)}; using broker quantities")
+            asyncio.run(send_alert(f"Restart reconciliation: positions differed for {', '.join(mismatched)}", error=True))
+    except Exception as e:
+        logging.error(f"Error reconciling positions with broker: {e}")
+        asyncio.run(send_alert(f"Error reconciling positions with broker: {e}", error=True))
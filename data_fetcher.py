@@ -1,46 +1,49 @@
 import pandas as pd
 import logging
-from kiteconnect import KiteConnect
+from kite_api_config import get_kite, get_rate_limiter, fetch_quotes
 from ta.trend import EMAIndicator, MACD
 from ta.momentum import RSIIndicator
 from ta.volatility import AverageTrueRange
 from datetime import datetime, timedelta
 from retrying import retry
 import os
-import requests
-from utils import load_excluded_stocks, send_alert
+from nse_client import get_index_data, nse_ttl
+from utils import get_excluded_stocks, send_alert, get_config, session_now
+from bar_builder import BarBuilder, CsvBarStore
+import threading
 from dotenv import load_dotenv
 import asyncio
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
+INDICATORS = ('ema_fast', 'ema_slow', 'rsi', 'macd', 'atr')
+
+_bar_builder = None
+_bar_builder_lock = threading.Lock()
+bar_store = None
+bar_store_suffix = ''
+bar_indicators = {}
+seeded_symbols = set()
 
 @retry(stop_max_attempt_number=3, wait_exponential_multiplier=1000, wait_exponential_max=10000)
-def get_nifty100_symbols():
+def get_index_symbols(index_name='NIFTY 100'):
     try:
-        url = "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20100"
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'application/json',
-            'Referer': 'https://www.nseindia.com'
-        }
-        session = requests.Session()
-        session.get("https://www.nseindia.com", headers=headers)
-        response = session.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        symbols = [item['symbol'] for item in data['data']]
-        logging.info(f"Fetched NIFTY 100 symbols from NSE: {len(symbols)} symbols")
+        data = get_index_data(index_name, ttl=nse_ttl('symbols', 21600))
+        symbols = [item['symbol'] for item in data['data'] if item['symbol'] != index_name]
+        logging.info(f"Fetched {index_name} symbols from NSE: {len(symbols)} symbols")
         return symbols
     except Exception as e:
-        logging.error(f"Error fetching NIFTY 100 symbols: {e}")
-        asyncio.run(send_alert(f"Error fetching NIFTY 100 symbols: {e}", error=True))
-        logging.warning("Using fallback NIFTY 100 symbols")
+        logging.error(f"Error fetching {index_name} symbols: {e}")
+        asyncio.run(send_alert(f"Error fetching {index_name} symbols: {e}", error=True))
+        logging.warning(f"Using fallback symbols for {index_name}")
         return ['RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'HINDUNILVR', 'ICICIBANK', 'SBIN']
 
+def get_nifty100_symbols():
+    return get_index_symbols('NIFTY 100')
+
+def get_universe_symbols():
+    return get_index_symbols(get_config().get('universe', {}).get('index', 'NIFTY 100'))
+
 def calculate_indicators(df):
     df['ema_fast'] = EMAIndicator(df['close'], window=12).ema_indicator()
     df['ema_slow'] = EMAIndicator(df['close'], window=26).ema_indicator()
@@ -57,13 +60,15 @@ def fetch_nifty100_data(start_date=None, end_date=None, save_to_csv=True):
     if end_date is None:
         end_date = datetime.now().strftime('%Y-%m-%d')
 
-    symbols = [s for s in get_nifty100_symbols() if s not in load_excluded_stocks()]
+    symbols = [s for s in get_nifty100_symbols() if s not in get_excluded_stocks()]
     all_data = []
 
     for symbol in symbols:
         try:
-            instrument_token = kite.ltp(f'NSE:{symbol}')[f'NSE:{symbol}']['instrument_token']
-            data = kite.historical_data(
+            get_rate_limiter('quote').acquire()
+            instrument_token = get_kite().ltp(f'NSE:{symbol}')[f'NSE:{symbol}']['instrument_token']
+            get_rate_limiter('historical').acquire()
+            data = get_kite().historical_data(
                 instrument_token=instrument_token,
                 from_date=start_date,
                 to_date=end_date,
@@ -93,14 +98,70 @@ def fetch_nifty100_data(start_date=None, end_date=None, save_to_csv=True):
 
     return combined_df
 
+def get_bar_builder():
+    global _bar_builder, bar_store
+    if _bar_builder is None:
+        with _bar_builder_lock:
+            if _bar_builder is None:
+                config = get_config().get('bars', {})
+                builder = BarBuilder(
+                    timeframes=config.get('timeframes', ['1m', '5m', '15m']),
+                    capacity=config.get('capacity', 240),
+                    session_start=config.get('session_start', '09:15'),
+                    session_end=config.get('session_end', '15:30')
+                )
+                bar_store = CsvBarStore(config.get('store_dir', 'data/bars'), suffix=bar_store_suffix)
+                builder.subscribe(bar_store)
+                builder.subscribe(update_bar_indicators)
+                _bar_builder = builder
+    return _bar_builder
+
+def update_bar_indicators(symbol, timeframe, bar=None):
+    frame = get_bar_builder().bar_frame(symbol, timeframe)
+    if len(frame) < get_config().get('bars', {}).get('min_indicator_bars', 30):
+        return
+    last = calculate_indicators(frame).iloc[-1]
+    bar_indicators[(symbol, timeframe)] = {name: float(last[name]) if pd.notna(last[name]) else 0.0 for name in INDICATORS}
+
+def seed_bars(symbol, instrument_token):
+    builder = get_bar_builder()
+    # A symbol restored from a checkpoint only needs the minutes since its snapshot.
+    from_date = builder.resume_time(symbol) or session_now() - timedelta(days=get_config().get('bars', {}).get('seed_days', 3))
+    get_rate_limiter('historical').acquire()
+    recent_data = get_kite().historical_data(
+        instrument_token=instrument_token,
+        from_date=from_date.strftime('%Y-%m-%d %H:%M:%S'),
+        to_date=session_now().strftime('%Y-%m-%d %H:%M:%S'),
+        interval='minute'
+    )
+    df = pd.DataFrame(recent_data)
+    if not df.empty:
+        builder.seed(symbol, df)
+    for timeframe in builder.timeframes:
+        update_bar_indicators(symbol, timeframe)
+
+def flush_bar_store():
+    if bar_store is not None:
+        bar_store.flush()
+
 @retry(stop_max_attempt_number=3, wait_fixed=2000)
-def fetch_nifty100_realtime():
-    symbols = [s for s in get_nifty100_symbols() if s not in load_excluded_stocks()]
+def fetch_nifty100_realtime(symbols=None):
+    symbols = [s for s in (symbols or get_universe_symbols()) if s not in get_excluded_stocks()]
     ticks = {}
+    builder = get_bar_builder()
+    now = session_now()
     try:
-        quotes = kite.ltp([f'NSE:{s}' for s in symbols])
+        quotes = fetch_quotes([f'NSE:{s}' for s in symbols])
         for symbol in symbols:
-            quote = quotes[f'NSE:{symbol}']
+            quote = quotes.get(f'NSE:{symbol}')
+            if quote is None:
+                continue
+            if symbol not in seeded_symbols:
+                try:
+                    seed_bars(symbol, quote['instrument_token'])
+                    seeded_symbols.add(symbol)
+                except Exception as e:
+                    logging.error(f"Error seeding bars for {symbol}: {e}")
             ticks[symbol] = {
                 'symbol': symbol,
                 'open': quote['ohlc']['open'],
@@ -109,22 +170,17 @@ def fetch_nifty100_realtime():
                 'close': quote['last_price'],
                 'volume': quote['volume']
             }
-            recent_data = kite.historical_data(
-                instrument_token=quote['instrument_token'],
-                from_date=(datetime.now() - timedelta(minutes=50)).strftime('%Y-%m-%d %H:%M:%S'),
-                to_date=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                interval='minute'
-            )
-            df = pd.DataFrame(recent_data)
-            if not df.empty:
-                df = calculate_indicators(df)
-                ticks[symbol].update({
-                    'ema_fast': df['ema_fast'].iloc[-1] if not df['ema_fast'].isna().iloc[-1] else 0.0,
-                    'ema_slow': df['ema_slow'].iloc[-1] if not df['ema_slow'].isna().iloc[-1] else 0.0,
-                    'rsi': df['rsi'].iloc[-1] if not df['rsi'].isna().iloc[-1] else 0.0,
-                    'macd': df['macd'].iloc[-1] if not df['macd'].isna().iloc[-1] else 0.0,
-                    'atr': df['atr'].iloc[-1] if not df['atr'].isna().iloc[-1] else 0.0
-                })
+            builder.update(symbol, quote['last_price'], quote['volume'], now)
+        builder.close_elapsed(now)
+        for symbol, tick in ticks.items():
+            for timeframe in builder.timeframes:
+                indicators = bar_indicators.get((symbol, timeframe))
+                if indicators is None:
+                    continue
+                if timeframe == '1m':
+                    tick.update(indicators)
+                else:
+                    tick.update({f'{name}_{timeframe}': value for name, value in indicators.items()})
     except Exception as e:
         logging.error(f"Error fetching real-time data: {e}")
         asyncio.run(send_alert(f"Error fetching real-time data: {e}", error=True))
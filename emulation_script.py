@@ -1,7 +1,7 @@
 from data_fetcher import fetch_nifty100_realtime
-from utils import send_alert
+from utils import send_alert, configure_logging
 from risk_engine import force_exit_positions, allowed
-from kiteconnect import KiteConnect
+from kite_api_config import get_kite
 import asyncio
 from global_context import fetch_global_context
 
@@ -19,10 +19,11 @@ def mock_kite_place_order(variety, exchange, tradingsymbol, transaction_type, qu
 def mock_kite_ltp(symbol):
     return {symbol: {'instrument_token': 'mock_token', 'last_price': 15.0, 'ohlc': {'open': 14.5, 'high': 15.5, 'low': 14.0, 'close': 15.0}, 'volume': 100000}}
 
-kite = KiteConnect(api_key="mock_key")
-kite.positions = mock_kite_positions
-kite.place_order = mock_kite_place_order
-kite.ltp = mock_kite_ltp
+def install_kite_mocks():
+    kite = get_kite()
+    kite.positions = mock_kite_positions
+    kite.place_order = mock_kite_place_order
+    kite.ltp = mock_kite_ltp
 
 def mock_fetch_nifty100_realtime():
     return {
@@ -53,6 +54,7 @@ def mock_fetch_global_context():
     }
 
 async def test_bot():
+    install_kite_mocks()
     ticks = mock_fetch_nifty100_realtime()
     global_ctx = mock_fetch_global_context()
     for symbol, tick in ticks.items():
@@ -64,7 +66,8 @@ async def test_bot():
         else:
             print(f"Trade blocked for {symbol} due to risk checks")
     print("Testing force exit...")
-    force_exit_positions()
+    await asyncio.to_thread(force_exit_positions)
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(test_bot())
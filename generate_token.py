@@ -4,10 +4,9 @@ from dotenv import load_dotenv
 import os
 import webbrowser
 import asyncio
-from utils import send_alert
+from utils import send_alert, configure_logging
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
 def generate_new_access_token():
     api_key = os.getenv('KITE_API_KEY')
@@ -39,4 +38,5 @@ def generate_new_access_token():
         raise
 
 if __name__ == "__main__":
+    configure_logging()
     generate_new_access_token()
@@ -1,89 +1,110 @@
-from kiteconnect import KiteConnect
+from kite_api_config import get_kite, get_rate_limiter
 from dotenv import load_dotenv
-import os
+import copy
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import yfinance as yf
-import requests
-from retrying import retry
+from nse_client import get_index_data, nse_ttl
 import asyncio
-from utils import send_alert
+from utils import send_alert, get_config
+from session_recorder import record
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
+GIFT_NIFTY_TICKER = '^NIFTY50'
+US_FUTURES_TICKERS = {'S&P 500': 'ES=F', 'Nasdaq': 'NQ=F', 'Dow': 'YM=F'}
+ASIAN_MARKETS_TICKERS = {'Nikkei': '^N225', 'Hang Seng': '^HSI'}
+USDINR_TICKER = 'INR=X'
+MARKET_TICKERS = [GIFT_NIFTY_TICKER, *US_FUTURES_TICKERS.values(), *ASIAN_MARKETS_TICKERS.values(), USDINR_TICKER]
+
+last_known_context = {
+    'india_vix': 0.0,
+    'gift_nifty_change': 0.0,
+    'us_futures_changes': {'S&P 500': 0.0, 'Nasdaq': 0.0, 'Dow': 0.0},
+    'asian_markets_changes': {'Nikkei': 0.0, 'Hang Seng': 0.0},
+    'usdinr_change': 0.0,
+    'sector_strength': {},
+    'top_sectors': []
+}
+_context_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='global-context')
+_in_flight = {}
 
-@retry(stop_max_attempt_number=3, wait_exponential_multiplier=1000, wait_exponential_max=10000)
 def fetch_nse_sector_indices():
-    try:
-        url = "https://www.nseindia.com/api/equity-stockIndices?index=SECTORAL%20INDICES"
-        headers = {
-            'User-Agent': 'Mozilla/5.0',
-            'Accept': 'application/json',
-            'Referer': 'https://www.nseindia.com'
-        }
-        session = requests.Session()
-        session.get("https://www.nseindia.com", headers=headers)
-        response = session.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        sector_data = {}
-        for item in data['data']:
-            sector_name = item['index']
-            daily_return = item.get('percentChange', 0.0) / 100.0
-            sector_data[sector_name] = daily_return
-        sorted_sectors = sorted(sector_data.items(), key=lambda x: x[1], reverse=True)
-        return {k: v for k, v in sorted_sectors}, sorted_sectors[:3]
-    except Exception as e:
-        logging.error(f"Error fetching NSE sector indices: {e}")
-        asyncio.run(send_alert(f"Error fetching NSE sector indices: {e}", error=True))
-        return {}, []
+    data = get_index_data('SECTORAL INDICES', ttl=nse_ttl('sector_indices', 30))
+    sector_data = {}
+    for item in data['data']:
+        sector_name = item['index']
+        daily_return = item.get('percentChange', 0.0) / 100.0
+        sector_data[sector_name] = daily_return
+    sorted_sectors = sorted(sector_data.items(), key=lambda x: x[1], reverse=True)
+    return {k: v for k, v in sorted_sectors}, sorted_sectors[:3]
+
+def fetch_market_changes():
+    data = yf.download(MARKET_TICKERS, period='1d', group_by='ticker', threads=True, progress=False, auto_adjust=False)
+    changes = {}
+    for ticker in MARKET_TICKERS:
+        if ticker not in data.columns.get_level_values(0):
+            continue
+        bars = data[ticker][['Open', 'Close']].dropna()
+        if bars.empty:
+            continue
+        changes[ticker] = float((bars['Close'].iloc[-1] - bars['Open'].iloc[-1]) / bars['Open'].iloc[-1])
+    if not changes:
+        raise ValueError("no market data returned")
+    return changes
+
+def fetch_india_vix():
+    # VIX has its own small budget so it never takes a token from the tick's quote fetches;
+    # between its tokens the last known value stands.
+    if not get_rate_limiter('vix').try_acquire():
+        with _context_lock:
+            return last_known_context['india_vix']
+    return get_kite().ltp('NSE:INDIAVIX')['NSE:INDIAVIX']['last_price']
+
+def _apply_market_changes(ctx, changes):
+    ctx['gift_nifty_change'] = changes.get(GIFT_NIFTY_TICKER, ctx['gift_nifty_change'])
+    for name, ticker in US_FUTURES_TICKERS.items():
+        ctx['us_futures_changes'][name] = changes.get(ticker, ctx['us_futures_changes'][name])
+    for name, ticker in ASIAN_MARKETS_TICKERS.items():
+        ctx['asian_markets_changes'][name] = changes.get(ticker, ctx['asian_markets_changes'][name])
+    ctx['usdinr_change'] = changes.get(USDINR_TICKER, ctx['usdinr_change'])
+
+def _apply_india_vix(ctx, vix):
+    ctx['india_vix'] = vix
+
+def _apply_sector_indices(ctx, result):
+    sector_data, top_sectors = result
+    ctx['sector_strength'] = sector_data
+    ctx['top_sectors'] = [s[0] for s in top_sectors]
+
+SOURCES = {
+    'market data': (fetch_market_changes, _apply_market_changes),
+    'India VIX': (fetch_india_vix, _apply_india_vix),
+    'NSE sector indices': (fetch_nse_sector_indices, _apply_sector_indices),
+}
+
+def _submit(name, fetch):
+    future = _in_flight.get(name)
+    if future is None or future.done():
+        future = _in_flight[name] = _executor.submit(fetch)
+    return future
 
-@retry(stop_max_attempt_number=3, wait_exponential_multiplier=1000, wait_exponential_max=10000)
 def fetch_global_context():
-    try:
-        vix = kite.ltp('NSE:INDIAVIX')['NSE:INDIAVIX']['last_price']
-        gift_nifty = yf.Ticker("^NIFTY50").history(period="1d")
-        gift_nifty_change = ((gift_nifty['Close'].iloc[-1] - gift_nifty['Open'].iloc[-1]) / gift_nifty['Open'].iloc[-1]) if not gift_nifty.empty else 0.0
-        us_futures = {
-            'S&P 500': yf.Ticker("ES=F").history(period="1d"),
-            'Nasdaq': yf.Ticker("NQ=F").history(period="1d"),
-            'Dow': yf.Ticker("YM=F").history(period="1d")
-        }
-        us_futures_changes = {
-            k: ((v['Close'].iloc[-1] - v['Open'].iloc[-1]) / v['Open'].iloc[-1]) if not v.empty else 0.0
-            for k, v in us_futures.items()
-        }
-        asian_markets = {
-            'Nikkei': yf.Ticker("^N225").history(period="1d"),
-            'Hang Seng': yf.Ticker("^HSI").history(period="1d")
-        }
-        asian_markets_changes = {
-            k: ((v['Close'].iloc[-1] - v['Open'].iloc[-1]) / v['Open'].iloc[-1]) if not v.empty else 0.0
-            for k, v in asian_markets.items()
-        }
-        usdinr = yf.Ticker("INR=X").history(period="1d")
-        usdinr_change = ((usdinr['Close'].iloc[-1] - usdinr['Open'].iloc[-1]) / usdinr['Open'].iloc[-1]) if not usdinr.empty else 0.0
-        sector_data, top_sectors = fetch_nse_sector_indices()
-        return {
-            'india_vix': vix,
-            'gift_nifty_change': gift_nifty_change,
-            'us_futures_changes': us_futures_changes,
-            'asian_markets_changes': asian_markets_changes,
-            'usdinr_change': usdinr_change,
-            'sector_strength': sector_data,
-            'top_sectors': [s[0] for s in top_sectors]
-        }
-    except Exception as e:
-        logging.error(f"Error fetching global context: {e}")
-        asyncio.run(send_alert(f"Error fetching global context: {e}", error=True))
-        return {
-            'india_vix': 0.0,
-            'gift_nifty_change': 0.0,
-            'us_futures_changes': {'S&P 500': 0.0, 'Nasdaq': 0.0, 'Dow': 0.0},
-            'asian_markets_changes': {'Nikkei': 0.0, 'Hang Seng': 0.0},
-            'usdinr_change': 0.0,
-            'sector_strength': {},
-            'top_sectors': []
-        }
+    timeout = get_config().get('global_context', {}).get('source_timeout', 5.0)
+    futures = {name: _submit(name, fetch) for name, (fetch, _) in SOURCES.items()}
+    wait(futures.values(), timeout=timeout)
+    with _context_lock:
+        for name, future in futures.items():
+            if not future.done():
+                logging.warning(f"Global context source {name} timed out after {timeout}s; using last known values")
+                continue
+            try:
+                SOURCES[name][1](last_known_context, future.result())
+            except Exception as e:
+                logging.error(f"Error fetching {name} for global context: {e}")
+                asyncio.run(send_alert(f"Error fetching {name} for global context: {e}", error=True))
+        context = copy.deepcopy(last_known_context)
+    record('global_context', None, context)
+    return context
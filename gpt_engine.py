@@ -5,11 +5,16 @@ import os
 from dotenv import load_dotenv
 import json
 from utils import send_alert
+from session_recorder import record
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
 async def approved(signal, explanation):
+    verdict = await _approved(signal, explanation)
+    record('llm', (signal['symbol'], signal['side']), verdict)
+    return verdict
+
+async def _approved(signal, explanation):
     provider = os.getenv('GPT_API_PROVIDER', 'xai').lower()
     try:
         if signal['confidence'] >= 0.7 and os.getenv('XAI_API_KEY'):
@@ -0,0 +1,235 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+import numpy as np
+from utils import get_cipher, get_config
+
+class Journal:
+    """Append-only, per-day segments of individually encrypted JSON records.
+
+    Each segment `<day>.log` has a sidecar `<day>.idx` listing the byte offset of every
+    record per symbol, so a query for one symbol decrypts only that symbol's lines.
+    """
+
+    def __init__(self, base_dir='logs/journal', index_every=50):
+        self.base_dir = base_dir
+        self.index_every = index_every
+        self._day = None
+        self._file = None
+        self._index = None
+        self._unindexed = 0
+        self._lock = threading.Lock()
+
+    def record(self, **fields):
+        now = datetime.now()
+        fields = {'ts': now.isoformat(timespec='milliseconds'), **fields}
+        line = get_cipher().encrypt(json.dumps(fields, default=str).encode()) + b'\n'
+        with self._lock:
+            self._open(now.date().isoformat())
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._index['symbols'].setdefault(fields.get('symbol', ''), []).append(offset)
+            self._index['size'] = offset + len(line)
+            self._unindexed += 1
+            if self._unindexed >= self.index_every:
+                self._write_index()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._write_index()
+
+    def _open(self, day):
+        if self._day == day:
+            return
+        if self._file is not None:
+            self._write_index()
+            self._file.close()
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._index = load_index(self.base_dir, day)
+        self._file = open(segment_path(self.base_dir, day), 'ab')
+        self._day = day
+
+    def _write_index(self):
+        path = index_path(self.base_dir, self._day)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+        self._unindexed = 0
+
+def segment_path(base_dir, day):
+    return os.path.join(base_dir, f'{day}.log')
+
+def index_path(base_dir, day):
+    return os.path.join(base_dir, f'{day}.idx')
+
+def load_index(base_dir, day):
+    """Read a segment's index, extending it over any records written after the last index flush."""
+    try:
+        with open(index_path(base_dir, day), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {'size': 0, 'symbols': {}}
+    path = segment_path(base_dir, day)
+    if os.path.exists(path) and os.path.getsize(path) > index['size']:
+        with open(path, 'rb') as f:
+            f.seek(index['size'])
+            offset = index['size']
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    symbol = _decrypt(line).get('symbol', '')
+                except Exception as e:
+                    logging.error(f"Unreadable journal record at {path}:{offset}: {e}")
+                    symbol = ''
+                index['symbols'].setdefault(symbol, []).append(offset)
+                offset += len(line)
+            index['size'] = offset
+    return index
+
+def _decrypt(line):
+    return json.loads(get_cipher().decrypt(line.rstrip(b'\n')))
+
+def iter_records(start, end, symbols=None, base_dir=None):
+    """Stream decrypted records for days in [start, end], reading only the requested symbols' lines."""
+    base_dir = base_dir or get_config().get('journal', {}).get('dir', 'logs/journal')
+    day = start
+    while day <= end:
+        path = segment_path(base_dir, day.isoformat())
+        if os.path.exists(path):
+            if symbols:
+                index = load_index(base_dir, day.isoformat())
+                offsets = sorted(o for s in symbols for o in index['symbols'].get(s, []))
+                with open(path, 'rb') as f:
+                    for offset in offsets:
+                        f.seek(offset)
+                        yield _decrypt(f.readline())
+            else:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        if line.endswith(b'\n'):
+                            yield _decrypt(line)
+        day += timedelta(days=1)
+
+class SymbolReport:
+    def __init__(self):
+        self.decisions = 0
+        self.executed = 0
+        self.rejections = Counter()
+        self.position = 0
+        self.average_price = 0.0
+        self.realized = 0.0
+        self.closes = 0
+        self.wins = 0
+        self.last_price = None
+        self.latencies = []
+
+    def add(self, record):
+        if record.get('event') == 'decision':
+            self.decisions += 1
+        if record.get('latency_ms') is not None:
+            self.latencies.append(record['latency_ms'])
+        if record.get('outcome') != 'executed':
+            self.rejections[record.get('reason') or record.get('outcome', 'unknown')] += 1
+            return
+        self.executed += 1
+        if record.get('price') and record.get('quantity'):
+            self._fill(1 if record['side'] == 'buy' else -1, int(record['quantity']), float(record['price']))
+
+    def _fill(self, direction, quantity, price):
+        self.last_price = price
+        if self.position == 0 or (self.position > 0) == (direction > 0):
+            held = abs(self.position)
+            self.average_price = (self.average_price * held + price * quantity) / (held + quantity)
+            self.position += direction * quantity
+            return
+        closing = min(quantity, abs(self.position))
+        pnl = closing * (price - self.average_price) * (1 if self.position > 0 else -1)
+        self.realized += pnl
+        self.closes += 1
+        self.wins += pnl > 0
+        self.position += direction * quantity
+        if self.position == 0:
+            self.average_price = 0.0
+        elif quantity > closing:
+            self.average_price = price
+
+    def summary(self):
+        unrealized = self.position * (self.last_price - self.average_price) if self.position and self.last_price else 0.0
+        latencies = np.array(self.latencies) if self.latencies else None
+        return {
+            'decisions': self.decisions,
+            'executed': self.executed,
+            'rejected': sum(self.rejections.values()),
+            'realized_pnl': round(self.realized, 2),
+            'open_qty': self.position,
+            'unrealized_pnl': round(unrealized, 2),
+            'hit_rate': round(self.wins / self.closes, 3) if self.closes else None,
+            'p50_latency_ms': round(float(np.percentile(latencies, 50)), 1) if latencies is not None else None,
+            'p95_latency_ms': round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None,
+        }
+
+def build_report(records):
+    reports, reasons = {}, Counter()
+    for record in records:
+        report = reports.setdefault(record.get('symbol', ''), SymbolReport())
+        report.add(record)
+        if record.get('outcome') != 'executed':
+            reasons[record.get('reason') or record.get('outcome', 'unknown')] += 1
+    return {symbol: report.summary() for symbol, report in sorted(reports.items())}, reasons
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                config = get_config().get('journal', {})
+                _journal = Journal(config.get('dir', 'logs/journal'), config.get('index_every', 50))
+    return _journal
+
+def flush_journal():
+    if _journal is not None:
+        _journal.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the encrypted decision and trade journal")
+    parser.add_argument('command', choices=['report', 'show'])
+    parser.add_argument('--from', dest='start', default=None, help="first day (YYYY-MM-DD), default 7 days ago")
+    parser.add_argument('--to', dest='end', default=None, help="last day (YYYY-MM-DD), default today")
+    parser.add_argument('--symbol', action='append', help="restrict to these symbols (repeatable)")
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end) if args.end else date.today()
+    start = date.fromisoformat(args.start) if args.start else end - timedelta(days=7)
+    symbols = [s.upper() for s in args.symbol] if args.symbol else None
+    records = iter_records(start, end, symbols)
+    if args.command == 'show':
+        for record in records:
+            print(json.dumps(record))
+        return
+    started = time.perf_counter()
+    per_symbol, reasons = build_report(records)
+    if not per_symbol:
+        print(f"No journal records between {start} and {end}")
+        return
+    import pandas as pd
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', None):
+        print(pd.DataFrame.from_dict(per_symbol, orient='index').to_string())
+    print("\nRejection reasons:")
+    for reason, count in reasons.most_common():
+        print(f"  {reason:<20} {count}")
+    print(f"\n{start} to {end}, {len(per_symbol)} symbols, {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
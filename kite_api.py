@@ -1,4 +1,4 @@
-from kiteconnect import KiteConnect
+from kite_api_config import get_kite, get_rate_limiter, fetch_quotes
 from retrying import retry
 import logging
 from dotenv import load_dotenv
@@ -8,10 +8,6 @@ import asyncio
 from utils import send_alert
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
-
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
 
 api_call_count = 0
 def increment_api_call():
@@ -24,7 +20,7 @@ def increment_api_call():
 def refresh_access_token():
     try:
         new_token = generate_new_access_token()
-        kite.set_access_token(new_token)
+        get_kite().set_access_token(new_token)
         with open('.env', 'r') as f:
             lines = f.readlines()
         with open('.env', 'w') as f:
@@ -42,7 +38,8 @@ def refresh_access_token():
 def fetch_market_tick(symbol='NSE:RELIANCE'):
     try:
         increment_api_call()
-        quote = kite.ltp(symbol)[symbol]
+        get_rate_limiter('quote').acquire()
+        quote = get_kite().ltp(symbol)[symbol]
         return {
             'symbol': symbol.split(':')[1],
             'open': quote['ohlc']['open'],
@@ -61,15 +58,16 @@ def fetch_market_tick(symbol='NSE:RELIANCE'):
 
 @retry(stop_max_attempt_number=3, wait_fixed=2000)
 def fetch_market_ticks():
-    from data_fetcher import get_nifty100_symbols
-    from utils import load_excluded_stocks
-    symbols = [f'NSE:{s}' for s in get_nifty100_symbols() if s not in load_excluded_stocks()]
+    from data_fetcher import get_universe_symbols
+    from utils import get_excluded_stocks
+    symbols = [f'NSE:{s}' for s in get_universe_symbols() if s not in get_excluded_stocks()]
     try:
-        increment_api_call()
-        quotes = kite.ltp(symbols)
+        quotes = fetch_quotes(symbols, on_request=increment_api_call)
         ticks = {}
         for symbol in symbols:
-            quote = quotes[symbol]
+            quote = quotes.get(symbol)
+            if quote is None:
+                continue
             ticks[symbol.split(':')[1]] = {
                 'symbol': symbol.split(':')[1],
                 'open': quote['ohlc']['open'],
@@ -1,10 +1,95 @@
-from kiteconnect import KiteConnect
-import logging
+import threading
+import time
 from dotenv import load_dotenv
 import os
 
-load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
+_kite = None
+_kite_lock = threading.Lock()
 
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
+def get_kite():
+    global _kite
+    if _kite is None:
+        with _kite_lock:
+            if _kite is None:
+                from kiteconnect import KiteConnect
+                load_dotenv()
+                client = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
+                from session_recorder import wrap_kite
+                client.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
+                _kite = wrap_kite(client)
+    return _kite
+
+DEFAULT_RATE_LIMITS = {'quote': 1.0, 'historical': 3.0, 'orders': 10.0, 'vix': 0.2}
+
+class RateLimiter:
+    """Token bucket. Pass a shared state array and lock to enforce one limit across processes."""
+
+    def __init__(self, rate, burst=1.0, state=None, lock=None):
+        self.rate = rate
+        self.burst = burst
+        self._state = state if state is not None else [burst, time.monotonic()]
+        self._lock = lock if lock is not None else threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """Take a token if one is available now, without waiting."""
+        return self.rate <= 0 or not self._take()
+
+    def _take(self):
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._state[0] + (now - self._state[1]) * self.rate)
+            self._state[1] = now
+            if tokens >= 1.0:
+                self._state[0] = tokens - 1.0
+                return 0.0
+            self._state[0] = tokens
+            return (1.0 - tokens) / self.rate
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def rate_limits():
+    from utils import get_config
+    return dict(DEFAULT_RATE_LIMITS, **get_config().get('kite', {}).get('rate_limits', {}))
+
+def get_rate_limiter(name):
+    limiter = _rate_limiters.get(name)
+    if limiter is None:
+        with _rate_limiters_lock:
+            limiter = _rate_limiters.get(name)
+            if limiter is None:
+                limiter = _rate_limiters[name] = RateLimiter(rate_limits().get(name, 0.0))
+    return limiter
+
+def shared_rate_limiters(context):
+    """Rate limiter state that can be handed to spawned processes through install_rate_limiters."""
+    return {name: (rate, context.Array('d', [1.0, time.monotonic()], lock=False), context.Lock())
+            for name, rate in rate_limits().items()}
+
+def install_rate_limiters(shared):
+    with _rate_limiters_lock:
+        for name, (rate, state, lock) in shared.items():
+            _rate_limiters[name] = RateLimiter(rate, state=state, lock=lock)
+
+def fetch_quotes(instruments, chunk_size=None, on_request=None):
+    """kite.ltp for any number of instruments, split under the per-request cap and rate limited."""
+    if chunk_size is None:
+        from utils import get_config
+        chunk_size = get_config().get('kite', {}).get('quote_chunk_size', 500)
+    limiter = get_rate_limiter('quote')
+    quotes = {}
+    for offset in range(0, len(instruments), chunk_size):
+        limiter.acquire()
+        if on_request:
+            on_request()
+        quotes.update(get_kite().ltp(instruments[offset:offset + chunk_size]))
+    return quotes
@@ -1,33 +1,38 @@
 import time
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from ai_trader.drl_agent import DRLTrader
-from strategy_engine import get_trade_features
-from risk_engine import allowed, force_exit_positions
+from strategy_engine import build_signals
+from risk_engine import risk_check, cap_signals, force_exit_positions
 from gpt_engine import approved as gpt_approved
-from utils import log_trade, send_alert, explain_decision, start_telegram_bot
+from utils import log_trade, send_alert, explain_decision, start_telegram_bot, configure_logging, get_config, session_now
 from global_context import fetch_global_context
-from data_fetcher import fetch_nifty100_realtime
-from kiteconnect import KiteConnect
+from data_fetcher import fetch_nifty100_realtime, flush_bar_store, get_universe_symbols
+from kite_api_config import get_kite, get_rate_limiter
 from dotenv import load_dotenv
 import asyncio
 import threading
-import os
 import schedule
+from bootstrap import bootstrap, STARTUP_COMPONENTS
+from checkpoint import restore_checkpoint, save_checkpoint
+from portfolio import get_ledger
+from journal import flush_journal
+from strategies import build_strategy_set
+from signal_state import get_signal_tracker, log_signal_stats
+from profiler import install_signal_handler
+from session_recorder import get_recorder, record, flush_recording, close_recording
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
-drl_trader = DRLTrader(model_path='models/drl_legend.pt')
 TICK_INTERVAL = 1
 trading_live = True
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
 
 def execute_trade(signal):
     try:
+        if signal['side'] in ('buy', 'sell'):
+            get_rate_limiter('orders').acquire()
+        order_id = None
         if signal['side'] == 'buy':
-            kite.place_order(
+            order_id = get_kite().place_order(
                 variety='regular',
                 exchange='NSE',
                 tradingsymbol=signal['symbol'],
@@ -37,7 +42,7 @@ def execute_trade(signal):
                 order_type='MARKET'
             )
         elif signal['side'] == 'sell':
-            kite.place_order(
+            order_id = get_kite().place_order(
                 variety='regular',
                 exchange='NSE',
                 tradingsymbol=signal['symbol'],
@@ -46,40 +51,129 @@ def execute_trade(signal):
                 product='MIS',
                 order_type='MARKET'
             )
+        if order_id is not None:
+            get_ledger().record_order(order_id, signal['symbol'], signal['side'], int(signal['size'] * 100))
         logging.info(f"Executed {signal['side']} for {signal['symbol']}")
+        return order_id
     except Exception as e:
         logging.error(f"Trade execution error: {e}")
         asyncio.run(send_alert(f"Trade execution error for {signal['symbol']}: {e}", error=True))
+        return None
 
-def process_stock(symbol, tick, global_ctx, drl_trader):
+def process_signal(signal, features, global_ctx, tick_started=None, approve=gpt_approved, tracker=None):
+    """Risk-check, approve and execute one signal. A rejected signal is deferred in `tracker`, to be
+    emitted again after its cooldown; a failed order releases the symbol's latch."""
+    symbol = signal['symbol']
+    outcome = 'rejected'
     try:
-        features = get_trade_features(tick, global_ctx)
-        signal = drl_trader.decide(features, symbol)
         explanation = explain_decision(signal, features)
-        if allowed(signal, global_ctx) and asyncio.run(gpt_approved(signal, explanation)):
-            execute_trade(signal)
-            log_trade(signal, explanation)
+        ok, reason = risk_check(signal, global_ctx)
+        if ok and not asyncio.run(approve(signal, explanation)):
+            ok, reason = False, 'gpt_veto'
+        if ok:
+            order_id = execute_trade(signal)
+            outcome = 'executed' if order_id is not None else 'order_failed'
+            latency_ms = (time.perf_counter() - tick_started) * 1000 if tick_started else None
+            if signal['side'] != 'hold':
+                log_trade(signal, explanation, outcome='executed' if order_id is not None else 'error',
+                          reason=None if order_id is not None else 'order_failed', order_id=order_id,
+                          quantity=int(signal['size'] * 100), latency_ms=latency_ms)
             asyncio.run(send_alert(f"{signal['side'].upper()} Signal: {explanation}"))
+        elif signal['side'] != 'hold':
+            log_trade(signal, explanation, outcome='rejected', reason=reason)
     except Exception as e:
         logging.error(f"Error processing {symbol}: {e}")
         asyncio.run(send_alert(f"Error for {symbol}: {e}", error=True))
+    finally:
+        if tracker and outcome == 'rejected':
+            tracker.defer(symbol)
+        elif tracker and outcome == 'order_failed':
+            tracker.release(symbol)
+
+def log_inference_latency(drl_trader, strategies):
+    for path, stats in drl_trader.latency_report().items():
+        logging.info(f"DRL {path} latency: {stats['batches']} batches, p50 {stats['p50_ms']:.2f}ms, "
+                     f"p95 {stats['p95_ms']:.2f}ms, max {stats['max_ms']:.2f}ms, {stats['us_per_row']:.1f}us/row")
+    for name, stats in strategies.latency_report().items():
+        logging.info(f"Strategy {name} compute: {stats['batches']} ticks, p50 {stats['p50_ms']:.2f}ms, "
+                     f"p95 {stats['p95_ms']:.2f}ms, max {stats['max_ms']:.2f}ms, {stats['us_per_row']:.1f}us/row")
+
+def start_shards(universe_config, symbols=None):
+    from universe_shards import ShardCoordinator
+    coordinator = ShardCoordinator(
+        symbols or get_universe_symbols(),
+        shards=universe_config['shards'],
+        timeout=universe_config.get('shard_timeout', 10.0),
+        startup_timeout=universe_config.get('shard_startup_timeout', 600.0)
+    )
+    coordinator.start()
+    return coordinator
+
+def run_tick(executor, strategies=None, coordinator=None, tracker=None, max_orders=0,
+             fetch_context=fetch_global_context, approve=gpt_approved):
+    """One pass of fetch, features, decisions and filtering; returns the futures of the signals
+    handed to the executor for risk checks, approval and execution."""
+    tick_started = time.perf_counter()
+    tick_time = session_now().timestamp()
+    record('tick', None, None)
+    if coordinator:
+        global_ctx = fetch_context()
+        signals, features = coordinator.run_tick(global_ctx)
+    else:
+        ticks = fetch_nifty100_realtime()
+        global_ctx = fetch_context()
+        signals, features = build_signals(ticks, global_ctx, strategies)
+    if tracker:
+        signals, features = tracker.filter(signals, features, now=tick_time)
+    signals, features = cap_signals(signals, features, max_orders)
+    return [executor.submit(process_signal, signal, row, global_ctx, tick_started, approve, tracker)
+            for signal, row in zip(signals, features)]
 
 def main():
+    configure_logging()
+    get_recorder()
+    install_signal_handler()
     threading.Thread(target=start_telegram_bot, daemon=True).start()
+    universe_config = get_config().get('universe', {})
+    sharded = universe_config.get('shards', 1) > 1
+    restore_checkpoint()
+    coordinator = strategies = None
+    # Each mode warms only what it reads: the shards load their own model, and the
+    # single-process tick fetches the universe itself.
+    if sharded:
+        symbols = bootstrap([name for name in STARTUP_COMPONENTS if name != 'drl_trader'])['symbols']
+        coordinator = start_shards(universe_config, symbols)
+    else:
+        drl_trader = bootstrap([name for name in STARTUP_COMPONENTS if name != 'symbols'])['drl_trader']
+        strategies = build_strategy_set(drl_trader)
+        schedule.every(15).minutes.do(log_inference_latency, drl_trader, strategies)
     schedule.every().day.at("15:15").do(force_exit_positions)
+    schedule.every(1).minutes.do(flush_bar_store)
+    schedule.every(1).minutes.do(flush_journal)
+    schedule.every(1).minutes.do(flush_recording)
+    checkpoint_interval = get_config().get('checkpoint', {}).get('interval', 30)
+    schedule.every(checkpoint_interval).seconds.do(save_checkpoint, include_bars=not sharded)
+    max_orders = universe_config.get('max_orders_per_tick', 0)
+    tracker = get_signal_tracker() if get_config().get('signals', {}).get('enabled', True) else None
+    if tracker:
+        schedule.every(15).minutes.do(log_signal_stats)
 
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        while trading_live:
-            try:
-                ticks = fetch_nifty100_realtime()
-                global_ctx = fetch_global_context()
-                for symbol, tick in ticks.items():
-                    executor.submit(process_stock, symbol, tick, global_ctx, drl_trader)
-                schedule.run_pending()
-            except Exception as e:
-                logging.error(f"Multi-stock error: {e}")
-                asyncio.run(send_alert(f"Multi-stock error: {e}", error=True))
-            time.sleep(TICK_INTERVAL)
+    try:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            while trading_live:
+                try:
+                    run_tick(executor, strategies, coordinator, tracker, max_orders)
+                    schedule.run_pending()
+                except Exception as e:
+                    logging.error(f"Multi-stock error: {e}")
+                    asyncio.run(send_alert(f"Multi-stock error: {e}", error=True))
+                time.sleep(TICK_INTERVAL)
+    finally:
+        flush_journal()
+        close_recording()
+        save_checkpoint(include_bars=not sharded)
+        if coordinator:
+            coordinator.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import quote
+import requests
+from utils import get_config
+from session_recorder import record
+
+NSE_BASE_URL = 'https://www.nseindia.com'
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'application/json',
+    'Referer': 'https://www.nseindia.com'
+}
+
+class NSEClient:
+    def __init__(self, cache_dir='data/cache/nse', timeout=10.0, min_interval=0.5, default_ttl=300):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.default_ttl = default_ttl
+        self.session = requests.Session()
+        self.session.headers.update(NSE_HEADERS)
+        self._primed = False
+        self._last_request = 0.0
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def get_json(self, path, params=None, ttl=None, allow_stale=True):
+        data = self._get_json(path, params, ttl, allow_stale)
+        record('nse', (path, tuple(sorted((params or {}).items()))), data, dedupe=True)
+        return data
+
+    def _get_json(self, path, params, ttl, allow_stale):
+        ttl = self.default_ttl if ttl is None else ttl
+        key = self._cache_key(path, params)
+        cached = self._read_cache(key)
+        if cached and time.time() - cached['fetched_at'] < ttl:
+            return cached['data']
+        try:
+            data = self._fetch(path, params)
+        except Exception as e:
+            if allow_stale and cached:
+                age = time.time() - cached['fetched_at']
+                logging.warning(f"NSE request {path} failed ({e}); serving cached response from {age:.0f}s ago")
+                return cached['data']
+            raise
+        self._write_cache(key, {'fetched_at': time.time(), 'data': data})
+        return data
+
+    def _fetch(self, path, params):
+        with self._lock:
+            if not self._primed:
+                self._prime()
+            response = self._get(path, params)
+            if response.status_code in (401, 403):
+                logging.info(f"NSE returned {response.status_code}; refreshing cookies")
+                self._prime()
+                response = self._get(path, params)
+            response.raise_for_status()
+            return response.json()
+
+    def _prime(self):
+        self.session.cookies.clear()
+        self._throttle()
+        self.session.get(NSE_BASE_URL, timeout=self.timeout)
+        self._primed = True
+
+    def _get(self, path, params):
+        self._throttle()
+        return self.session.get(NSE_BASE_URL + path, params=params, timeout=self.timeout)
+
+    def _throttle(self):
+        wait = self._last_request + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def _cache_key(self, path, params):
+        raw = path + '?' + '&'.join(f'{k}={v}' for k, v in sorted((params or {}).items()))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _read_cache(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(os.path.join(self.cache_dir, f'{key}.json'), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memory[key] = entry
+        return entry
+
+    def _write_cache(self, key, entry):
+        self._memory[key] = entry
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, f'{key}.json')
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.error(f"Error writing NSE cache: {e}")
+
+_nse_client = None
+_nse_client_lock = threading.Lock()
+
+def get_nse_client():
+    global _nse_client
+    if _nse_client is None:
+        with _nse_client_lock:
+            if _nse_client is None:
+                config = get_config().get('nse', {})
+                _nse_client = NSEClient(
+                    cache_dir=config.get('cache_dir', 'data/cache/nse'),
+                    timeout=config.get('timeout', 10.0),
+                    min_interval=config.get('min_interval', 0.5),
+                    default_ttl=config.get('default_ttl', 300)
+                )
+    return _nse_client
+
+def nse_ttl(name, default):
+    return get_config().get('nse', {}).get('ttl', {}).get(name, default)
+
+def get_index_data(index_name, ttl):
+    return get_nse_client().get_json(f"/api/equity-stockIndices?index={quote(index_name)}", ttl=ttl)
@@ -0,0 +1,253 @@
+import argparse
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils import configure_logging, get_config
+
+RULE_CONFIDENCE = 0.7
+TRADING_DAYS = 252
+CONTEXT_COLUMNS = ('india_vix', 'gift_nifty_change')
+
+DEFAULT_GRID = {
+    'rsi_buy': [25, 30, 35],
+    'rsi_sell': [65, 70, 75],
+    'confidence_threshold': [0.65],
+    'max_drawdown': [0.01, 0.02, 0.05],
+    'vix_threshold': [20.0],
+    'gift_nifty_gap': [0.01],
+    'sector_rank_threshold': [3],
+}
+
+_arrays = None
+
+def load_history(path):
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True).dt.tz_convert('Asia/Kolkata').dt.tz_localize(None)
+    if 'rsi' not in df.columns:
+        from data_fetcher import calculate_indicators
+        df = df.sort_values(['symbol', 'timestamp'])
+        df = pd.concat([calculate_indicators(group.copy()) for _, group in df.groupby('symbol')], ignore_index=True)
+    return df
+
+def build_arrays(df, out_dir):
+    """Pivot the long history into symbol x time arrays and save them as .npy files for memory mapping."""
+    close = df.pivot_table(index='timestamp', columns='symbol', values='close').sort_index()
+    timestamps = close.index
+    symbols = list(close.columns)
+    fields = {
+        'close': close.ffill().to_numpy().T,
+        'rsi': df.pivot_table(index='timestamp', columns='symbol', values='rsi').reindex(timestamps)[symbols].to_numpy().T,
+    }
+    if 'sector_rank' in df.columns:
+        rank = df.pivot_table(index='timestamp', columns='symbol', values='sector_rank').reindex(timestamps)[symbols]
+        fields['sector_rank'] = rank.to_numpy().T
+    for column in CONTEXT_COLUMNS:
+        if column in df.columns:
+            fields[column] = df.groupby('timestamp')[column].mean().reindex(timestamps).ffill().to_numpy()
+    days = timestamps.normalize()
+    fields['day'] = pd.factorize(days)[0].astype(np.int32)
+    fields['minute'] = (timestamps.hour * 60 + timestamps.minute).to_numpy().astype(np.int32)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for name, values in fields.items():
+        paths[name] = os.path.join(out_dir, f'{name}.npy')
+        np.save(paths[name], np.ascontiguousarray(values, dtype=np.int32 if name in ('day', 'minute') else np.float64))
+    return paths, symbols, sorted(set(days.date))
+
+def walk_forward_splits(n_days, train_days, test_days):
+    splits = []
+    start = 0
+    while start + train_days + test_days <= n_days:
+        splits.append(((start, start + train_days), (start + train_days, start + train_days + test_days)))
+        start += test_days
+    return splits
+
+def param_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _init_worker(paths):
+    global _arrays
+    _arrays = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+def simulate(arrays, params, day_range, cost_bps=3.0, exit_minute=15 * 60 + 15):
+    """Replay the rule strategy and risk gates over [first_day, last_day) for every symbol at once."""
+    day = arrays['day']
+    lo, hi = np.searchsorted(day, day_range[0]), np.searchsorted(day, day_range[1])
+    close = np.asarray(arrays['close'][:, lo:hi])
+    rsi = np.asarray(arrays['rsi'][:, lo:hi])
+    day, minute = np.asarray(day[lo:hi]), np.asarray(arrays['minute'][lo:hi])
+    n_symbols, n_steps = close.shape
+
+    signal = np.where(rsi < params['rsi_buy'], 1, np.where(rsi > params['rsi_sell'], -1, 0)).astype(np.int8)
+    if RULE_CONFIDENCE < params['confidence_threshold']:
+        signal[:] = 0
+    if 'india_vix' in arrays:
+        signal[:, np.asarray(arrays['india_vix'][lo:hi]) > params['vix_threshold']] = 0
+    if 'gift_nifty_change' in arrays:
+        signal[:, np.asarray(arrays['gift_nifty_change'][lo:hi]) < -params['gift_nifty_gap']] = 0
+    if 'sector_rank' in arrays:
+        signal[np.asarray(arrays['sector_rank'][:, lo:hi]) > params['sector_rank_threshold']] = 0
+    signal[:, minute >= exit_minute] = 0
+
+    returns = np.zeros_like(close)
+    returns[:, 1:] = np.nan_to_num(close[:, 1:] / close[:, :-1] - 1.0, nan=0.0, posinf=0.0, neginf=0.0)
+    steps = np.arange(n_steps)
+    day_start = np.r_[True, day[1:] != day[:-1]] if n_steps else np.zeros(0, dtype=bool)
+    day_end = np.r_[day_start[1:], True] if n_steps else np.zeros(0, dtype=bool)
+    flat = day_end | (minute >= exit_minute)
+    signal[:, flat] = 0
+
+    # A position is held until the opposite signal, the exit time or the end of the day.
+    events = (signal != 0) | flat | day_start
+    target = np.take_along_axis(signal, np.maximum.accumulate(np.where(events, steps, 0), axis=1), axis=1)
+
+    # Once the day's P&L breaches max_drawdown everything is flattened until the next session.
+    cost = cost_bps / 10000.0
+    pnl, turnover = _step_pnl(target, returns)
+    gross = pnl.mean(axis=0)
+    running = np.cumsum(gross - turnover * cost) + turnover * cost
+    running -= (running - gross)[np.maximum.accumulate(np.where(day_start, steps, 0))]
+    breached = running < -params['max_drawdown']
+    if breached.any():
+        session = np.maximum.accumulate(np.where(day_start, steps, 0))
+        halted = np.maximum.accumulate(np.where(breached, steps, -1)) >= session
+        target[:, halted] = 0
+        pnl, turnover = _step_pnl(target, returns)
+    step_pnl = pnl.mean(axis=0) - turnover * cost
+
+    changed = target != np.concatenate([np.zeros((n_symbols, 1), dtype=target.dtype), target[:, :-1]], axis=1)
+    previous = np.concatenate([np.zeros((n_symbols, 1), dtype=np.int64),
+                               np.maximum.accumulate(np.where(changed, steps, 0), axis=1)[:, :-1]], axis=1)
+    cumulative = np.cumsum(pnl, axis=1)
+    trade_pnl = cumulative - np.take_along_axis(cumulative, previous, axis=1)
+    closing = changed & np.concatenate([np.zeros((n_symbols, 1), dtype=bool), target[:, :-1] != 0], axis=1)
+    trades = int(closing.sum())
+    wins = int((trade_pnl[closing] > 0).sum())
+
+    daily = np.bincount(day - day[0], weights=step_pnl) if n_steps else np.zeros(0)
+    equity = np.cumsum(daily)
+    drawdown = float(np.max(np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity)) if len(equity) else 0.0
+    std = daily.std()
+    return {
+        'return': float(equity[-1]) if len(equity) else 0.0,
+        'sharpe': float(daily.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        'max_drawdown': drawdown,
+        'trades': trades,
+        'hit_rate': wins / trades if trades else 0.0,
+    }
+
+def _step_pnl(target, returns):
+    held = np.zeros_like(target)
+    held[:, 1:] = target[:, :-1]
+    turnover = np.abs(target.astype(np.int16) - held).sum(axis=0) / len(target)
+    return held * returns, turnover
+
+def _evaluate(task):
+    index, params, splits, cost_bps, exit_minute = task
+    results = []
+    for train, test in splits:
+        results.append((simulate(_arrays, params, train, cost_bps, exit_minute),
+                        simulate(_arrays, params, test, cost_bps, exit_minute)))
+    return index, results
+
+def run_sweep(paths, n_days, grid, train_days=10, test_days=5, cost_bps=3.0, exit_time='15:15',
+              objective='sharpe', workers=None):
+    splits = walk_forward_splits(n_days, train_days, test_days)
+    if not splits:
+        raise ValueError(f"Need at least {train_days + test_days} days of history, found {n_days}")
+    hours, minutes = map(int, exit_time.split(':'))
+    combos = param_grid(grid)
+    tasks = [(i, params, splits, cost_bps, hours * 60 + minutes) for i, params in enumerate(combos)]
+    scores = [None] * len(combos)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(paths,)) as pool:
+        for index, result in pool.map(_evaluate, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))):
+            scores[index] = result
+
+    rows = []
+    for params, per_split in zip(combos, scores):
+        row = dict(params)
+        for phase, pos in (('train', 0), ('test', 1)):
+            for metric in per_split[0][pos]:
+                row[f'{phase}_{metric}'] = float(np.mean([split[pos][metric] for split in per_split]))
+        rows.append(row)
+    table = pd.DataFrame(rows)
+
+    # Walk-forward: pick the best in-sample combination per split and report how it did out of sample.
+    selected = []
+    for s, (train, test) in enumerate(splits):
+        best = max(range(len(combos)), key=lambda i: scores[i][s][0][objective])
+        selected.append({'split': s, 'train_days': f'{train[0]}-{train[1] - 1}', 'test_days': f'{test[0]}-{test[1] - 1}',
+                         **combos[best], f'train_{objective}': scores[best][s][0][objective],
+                         **{f'test_{k}': v for k, v in scores[best][s][1].items()}})
+    ranked = table.sort_values([f'test_{objective}', f'train_{objective}'], ascending=False).reset_index(drop=True)
+    ranked.index += 1
+    return ranked, pd.DataFrame(selected)
+
+def _parse_overrides(values):
+    overrides = {}
+    for value in values or []:
+        name, _, options = value.partition('=')
+        overrides[name] = [_parse_number(v) for v in options.split(',')]
+    return overrides
+
+def _parse_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+def main():
+    config = get_config().get('sweep', {})
+    parser = argparse.ArgumentParser(description="Walk-forward parameter sweep over the local minute history")
+    parser.add_argument('--data', default=config.get('data', 'data/nifty100.csv'))
+    parser.add_argument('--output-dir', default=config.get('output_dir', 'data/sweeps'))
+    parser.add_argument('--train-days', type=int, default=config.get('train_days', 10))
+    parser.add_argument('--test-days', type=int, default=config.get('test_days', 5))
+    parser.add_argument('--cost-bps', type=float, default=config.get('cost_bps', 3.0))
+    parser.add_argument('--objective', default=config.get('objective', 'sharpe'), choices=['sharpe', 'return', 'hit_rate'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--param', action='append', metavar='NAME=V1,V2', help="override one grid dimension")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID, **config.get('grid', {}))
+    grid.update(_parse_overrides(args.param))
+    start = time.perf_counter()
+    df = load_history(args.data)
+    work_dir = tempfile.mkdtemp(prefix='sweep-')
+    try:
+        paths, symbols, days = build_arrays(df, work_dir)
+        del df
+        ignored = [name for name, column in (('vix_threshold', 'india_vix'), ('gift_nifty_gap', 'gift_nifty_change'),
+                                             ('sector_rank_threshold', 'sector_rank'))
+                   if column not in paths and len(grid.get(name, [])) > 1]
+        if ignored:
+            logging.warning(f"History has no columns for {', '.join(ignored)}; those dimensions do not affect results")
+        ranked, selected = run_sweep(paths, len(days), grid, args.train_days, args.test_days, args.cost_bps,
+                                     config.get('exit_time', '15:15'), args.objective, args.workers)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    ranked.to_csv(os.path.join(args.output_dir, f'sweep-{stamp}.csv'), index_label='rank')
+    selected.to_csv(os.path.join(args.output_dir, f'walk-forward-{stamp}.csv'), index=False)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Swept {len(ranked)} combinations over {len(symbols)} symbols and {len(days)} days in {elapsed:.1f}s")
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.4f}'.format):
+        print(f"{len(ranked)} combinations, {len(symbols)} symbols, {len(days)} days, {len(selected)} walk-forward splits, {elapsed:.1f}s")
+        print(ranked.head(args.top).to_string())
+        print("\nWalk-forward selections:")
+        print(selected.to_string(index=False))
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from datetime import date
+
+FINAL_ORDER_STATUSES = ('COMPLETE', 'CANCELLED', 'REJECTED')
+
+class PositionLedger:
+    """What the bot believes it holds: net quantities, orders awaiting a fill and the day's equity peak."""
+
+    def __init__(self, capital=1000000.0):
+        self.capital = capital
+        self.positions = {}
+        self.pending_orders = {}
+        self.session_day = date.today().isoformat()
+        self.high_water_mark = capital
+        self._lock = threading.Lock()
+
+    def record_order(self, order_id, symbol, side, quantity):
+        signed = quantity if side == 'buy' else -quantity
+        with self._lock:
+            self.pending_orders[order_id] = {'symbol': symbol, 'side': side, 'quantity': quantity, 'placed_at': time.time()}
+            self.positions[symbol] = self.positions.get(symbol, 0) + signed
+            if self.positions[symbol] == 0:
+                del self.positions[symbol]
+
+    def expire_pending(self, max_age):
+        """Forget orders placed more than `max_age` seconds ago; market orders are long filled or
+        rejected by then, and restore reconciles against the broker anyway. Returns how many went."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [order_id for order_id, order in self.pending_orders.items() if order['placed_at'] < cutoff]
+            for order_id in expired:
+                del self.pending_orders[order_id]
+        return len(expired)
+
+    def mark_equity(self, equity):
+        """Track the day's high-water mark and return the drawdown from it as a fraction."""
+        with self._lock:
+            self._roll_session()
+            self.high_water_mark = max(self.high_water_mark, equity)
+            return max(0.0, (self.high_water_mark - equity) / self.high_water_mark)
+
+    def reconcile(self, kite):
+        """Make the broker's view authoritative; returns the symbols whose quantity disagreed."""
+        broker = {}
+        for pos in kite.positions()['day']:
+            if pos['quantity']:
+                broker[pos['tradingsymbol']] = broker.get(pos['tradingsymbol'], 0) + pos['quantity']
+        orders = {order['order_id']: order for order in kite.orders()}
+        with self._lock:
+            self._roll_session()
+            mismatched = sorted(s for s in set(broker) | set(self.positions) if broker.get(s, 0) != self.positions.get(s, 0))
+            for order_id in list(self.pending_orders):
+                order = orders.get(order_id)
+                if order is None or order['status'] in FINAL_ORDER_STATUSES:
+                    del self.pending_orders[order_id]
+            self.positions = broker
+        return mismatched
+
+    def state(self):
+        with self._lock:
+            return {
+                'positions': dict(self.positions),
+                'pending_orders': dict(self.pending_orders),
+                'session_day': self.session_day,
+                'high_water_mark': self.high_water_mark,
+            }
+
+    def restore(self, state):
+        with self._lock:
+            if state['session_day'] != date.today().isoformat():
+                return
+            self.positions = dict(state['positions'])
+            self.pending_orders = dict(state['pending_orders'])
+            self.session_day = state['session_day']
+            self.high_water_mark = state['high_water_mark']
+
+    def _roll_session(self):
+        today = date.today().isoformat()
+        if self.session_day != today:
+            self.session_day = today
+            self.high_water_mark = self.capital
+            self.pending_orders.clear()
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                from utils import get_config
+                _ledger = PositionLedger(get_config()['risk'].get('capital', 1000000.0))
+    return _ledger
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from utils import get_config, send_alert
+
+# Leaf frames where a thread is parked rather than working: pool workers waiting for jobs,
+# the Telethon event loop in select(), pipe polls and lock/condition waits.
+IDLE_FUNCTIONS = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('connection.py', '_poll'),
+    ('connection.py', 'wait'),
+}
+
+class SamplingProfiler:
+    """Wall-clock sampler over every thread in this process, started and stopped at runtime.
+
+    A daemon thread snapshots all stacks with sys._current_frames every `interval` seconds, so
+    nothing is traced between samples. Results are written as collapsed stacks (one
+    `thread;outer;...;leaf count` line per distinct stack, the input format of flamegraph.pl and
+    speedscope) next to a plain-text hot-function summary. The summary leaves out samples parked
+    in IDLE_FUNCTIONS; a C-level sleep such as time.sleep has no frame of its own and shows up on
+    the line that called it.
+    """
+
+    def __init__(self, out_dir='logs/profiles', interval=0.01, top=15):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.top = top
+        self._thread = None
+        self._stop = None
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, on_complete=None):
+        """Sample for `duration` seconds; `on_complete(result)` runs on the sampler thread afterwards."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(duration, on_complete, self._stop),
+                                            name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """End the current window early; the results are still written and reported."""
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            return True
+
+    def _run(self, duration, on_complete, stop):
+        own = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        next_sample = started
+        while not stop.is_set() and next_sample - started < duration:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes, lines = [], []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    lines.append(frame.f_lineno)
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stacks[(names.get(ident, f'thread-{ident}'), tuple(codes), tuple(lines))] += 1
+            samples += 1
+            next_sample = max(next_sample + self.interval, time.perf_counter())
+            stop.wait(next_sample - time.perf_counter())
+        elapsed = time.perf_counter() - started
+        try:
+            result = self._write(stacks, samples, elapsed)
+        except Exception as e:
+            logging.error(f"Error writing profile: {e}")
+            asyncio.run(send_alert(f"Error writing profile: {e}", error=True))
+            return
+        logging.info(f"Profile of {elapsed:.1f}s written to {result['collapsed']}")
+        if on_complete:
+            on_complete(result)
+
+    def _write(self, stacks, samples, elapsed):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{os.getpid()}")
+        own_time, total_time, threads, idle_threads = Counter(), Counter(), Counter(), Counter()
+        with open(f'{stem}.collapsed', 'w') as f:
+            for (thread, codes, lines), count in stacks.items():
+                frames = ';'.join(self._line_label(code, line) for code, line in zip(reversed(codes), reversed(lines)))
+                f.write(f"{thread.replace(';', ':')};{frames} {count}\n")
+                threads[thread] += count
+                if (os.path.basename(codes[0].co_filename), codes[0].co_name) in IDLE_FUNCTIONS:
+                    idle_threads[thread] += count
+                    continue
+                own_time[self._line_label(codes[0], lines[0])] += count
+                for function in {self._function_label(code) for code in codes}:
+                    total_time[function] += count
+        summary = self._summary(elapsed, samples, own_time, total_time, threads, idle_threads)
+        with open(f'{stem}.txt', 'w') as f:
+            f.write(summary + '\n')
+        return {'collapsed': f'{stem}.collapsed', 'summary_path': f'{stem}.txt', 'summary': summary,
+                'samples': samples, 'duration': elapsed}
+
+    def _summary(self, elapsed, samples, own_time, total_time, threads, idle_threads):
+        busy = sum(own_time.values())
+        lines = [f"Profile: {elapsed:.1f}s, {samples} samples, {len(threads)} threads, "
+                 f"{busy} active thread-samples ({sum(idle_threads.values())} parked)"]
+        lines.append("Threads (% of samples active):")
+        for thread, count in threads.most_common():
+            lines.append(f"  {100 * (count - idle_threads[thread]) / max(samples, 1):5.1f}%  {thread}")
+        lines.append(f"Top {self.top} by own time:")
+        for label, count in own_time.most_common(self.top):
+            lines.append(f"  {100 * count / max(busy, 1):5.1f}%  {label}")
+        lines.append(f"Top {self.top} by total time:")
+        for label, count in total_time.most_common(self.top):
+            lines.append(f"  {100 * count / max(busy, 1):5.1f}%  {label}")
+        return '\n'.join(lines)
+
+    def _line_label(self, code, line):
+        key = (code, line)
+        label = self._labels.get(key)
+        if label is None:
+            label = self._labels[key] = f"{code.co_name} ({_short_path(code.co_filename)}:{line})"
+        return label
+
+    def _function_label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)})"
+        return label
+
+def _short_path(path):
+    if 'site-packages' in path:
+        return path.split('site-packages' + os.sep, 1)[-1]
+    cwd = os.getcwd() + os.sep
+    if path.startswith(cwd):
+        return path[len(cwd):]
+    return os.path.basename(path)
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                config = get_config().get('profiler', {})
+                _profiler = SamplingProfiler(
+                    out_dir=config.get('dir', 'logs/profiles'),
+                    interval=config.get('interval', 0.01),
+                    top=config.get('top', 15)
+                )
+    return _profiler
+
+def profile_window(seconds=None):
+    """Clamp a requested window to the configured bounds."""
+    config = get_config().get('profiler', {})
+    seconds = config.get('default_seconds', 30) if seconds is None else seconds
+    return max(1.0, min(float(seconds), config.get('max_seconds', 600)))
+
+def report_profile(result):
+    asyncio.run(send_alert(f"{result['summary']}\nCollapsed stacks: {result['collapsed']}"))
+
+def _toggle_profiler(signum, frame):
+    profiler = get_profiler()
+    if not profiler.stop():
+        seconds = profile_window()
+        profiler.start(seconds, on_complete=report_profile)
+        logging.info(f"Profiling all threads for {seconds:.0f}s (signal {signum})")
+
+def install_signal_handler():
+    """SIGUSR1 starts a default-length profile, or ends the running one early. Main thread only."""
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, _toggle_profiler)
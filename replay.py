@@ -0,0 +1,283 @@
+import argparse
+import glob
+import logging
+import os
+import pickle
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+import numpy as np
+from session_recorder import RecordedError, call_key, disable_recording, read_recording
+
+class Tape:
+    """A recorded session indexed for lookup by time.
+
+    Quotes are indexed per instrument, so a replay can ask for any set of symbols regardless of
+    how the live run chunked or sharded its quote calls. Every other input is a time series per
+    (kind, key), and a lookup returns the latest entry recorded before the replay's horizon.
+    """
+
+    def __init__(self, paths):
+        self.ticks = []
+        self._series = defaultdict(lambda: ([], []))
+        self._queues = defaultdict(deque)
+        self._quote_events = []
+        quote_index = defaultdict(lambda: ([], []))
+        events = sorted((event for path in paths for event in read_recording(path)), key=lambda event: event[0])
+        for ts, kind, key, data in events:
+            if kind == 'tick':
+                self.ticks.append(ts)
+            elif kind == 'kite' and key[0] in ('ltp', 'quote', 'ohlc'):
+                payload = pickle.loads(data)
+                if isinstance(payload, RecordedError):
+                    continue
+                event_id = len(self._quote_events)
+                self._quote_events.append(data)
+                for instrument in payload:
+                    times, ids = quote_index[(key[0], instrument)]
+                    times.append(ts)
+                    ids.append(event_id)
+            else:
+                times, payloads = self._series[(kind, key)]
+                times.append(ts)
+                payloads.append(data)
+                if kind == 'kite' and key[0] == 'place_order':
+                    self._queues[key].append(data)
+        self._quotes = {key: (np.array(times), np.array(ids)) for key, (times, ids) in quote_index.items()}
+        self._decoded = OrderedDict()
+        self.events = len(events)
+        self.misses = 0
+
+    def quotes(self, method, instruments, horizon):
+        found = {}
+        for instrument in instruments:
+            index = self._quotes.get((method, instrument))
+            if index is None:
+                continue
+            position = np.searchsorted(index[0], horizon, side='left') - 1
+            if position < 0:
+                continue
+            quote = self._quote_event(int(index[1][position])).get(instrument)
+            if quote is not None:
+                found[instrument] = quote
+        self.misses += len(instruments) - len(found)
+        return found
+
+    def at(self, kind, key, horizon):
+        """Latest payload for (kind, key) recorded before `horizon`, else the earliest one, else None."""
+        series = self._series.get((kind, key))
+        if series is None:
+            self.misses += 1
+            return None
+        position = max(0, bisect_left(series[0], horizon) - 1)
+        return pickle.loads(series[1][position])
+
+    def take(self, kind, key):
+        queue = self._queues.get(key)
+        return pickle.loads(queue.popleft()) if queue else None
+
+    def _quote_event(self, event_id):
+        payload = self._decoded.get(event_id)
+        if payload is None:
+            payload = self._decoded[event_id] = pickle.loads(self._quote_events[event_id])
+            if len(self._decoded) > 256:
+                self._decoded.popitem(last=False)
+        return payload
+
+class ReplayKite:
+    """Stands in for KiteConnect, answering from the tape at the replay's current horizon. Orders never leave the process."""
+
+    def __init__(self, tape, replayer):
+        self._tape = tape
+        self._replayer = replayer
+        self.orders_placed = 0
+
+    def ltp(self, *instruments):
+        return self._quotes('ltp', instruments)
+
+    def quote(self, *instruments):
+        return self._quotes('quote', instruments)
+
+    def ohlc(self, *instruments):
+        return self._quotes('ohlc', instruments)
+
+    def place_order(self, **kwargs):
+        self.orders_placed += 1
+        order_id = self._tape.take('kite', call_key('place_order', (), kwargs))
+        if isinstance(order_id, RecordedError):
+            raise order_id
+        return order_id if order_id is not None else f'replay-{self.orders_placed}'
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            result = self._tape.at('kite', call_key(name, args, kwargs), self._replayer.horizon)
+            if isinstance(result, RecordedError):
+                raise result
+            return result
+        return call
+
+    def _quotes(self, method, instruments):
+        flat = [i for item in instruments for i in ([item] if isinstance(item, str) else item)]
+        return self._tape.quotes(method, flat, self._replayer.horizon)
+
+class ReplayNSEClient:
+    def __init__(self, tape, replayer):
+        self._tape = tape
+        self._replayer = replayer
+
+    def get_json(self, path, params=None, ttl=None, allow_stale=True):
+        data = self._tape.at('nse', (path, tuple(sorted((params or {}).items()))), self._replayer.horizon)
+        if data is None:
+            raise ValueError(f"No recorded NSE response for {path}")
+        return data
+
+class Replayer:
+    """Drives main.run_tick over a recorded session.
+
+    Each recorded tick runs with the session clock at the tick's timestamp, and inputs are
+    served as they were just before the next tick started. `speed` 1 replays in real time,
+    N runs N times faster, 0 runs as fast as the pipeline allows. Each tick's signals finish
+    before the next tick starts, so a replay is deterministic at any speed.
+    """
+
+    def __init__(self, session_dir, speed=1.0, output_dir='data/replays', workers=3):
+        paths = sorted(glob.glob(os.path.join(session_dir, '*.rec')))
+        if not paths:
+            raise FileNotFoundError(f"No recordings in {session_dir}")
+        self.tape = Tape(paths)
+        if not self.tape.ticks:
+            raise ValueError(f"{session_dir} has no recorded ticks")
+        self.speed = speed
+        self.workers = workers
+        self.output_dir = os.path.join(output_dir, f"{os.path.basename(os.path.normpath(session_dir))}-"
+                                                    f"{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.horizon = self.tape.ticks[0]
+        self.session_time = self.tape.ticks[0]
+        self.kite = ReplayKite(self.tape, self)
+
+    def install(self):
+        """Point the broker, NSE, clock, rate limits, journal and bar store at the replay."""
+        import data_fetcher
+        import journal
+        import kite_api_config
+        import nse_client
+        import utils
+        disable_recording()
+        kite_api_config._kite = self.kite
+        nse_client._nse_client = ReplayNSEClient(self.tape, self)
+        for name in kite_api_config.rate_limits():
+            kite_api_config._rate_limiters[name] = kite_api_config.RateLimiter(0.0)
+        utils.set_session_clock(lambda: datetime.fromtimestamp(self.session_time))
+        journal._journal = journal.Journal(os.path.join(self.output_dir, 'journal'))
+        data_fetcher.bar_store_suffix = '.replay'
+
+    def run(self, start=None, end=None):
+        from bootstrap import bootstrap
+        from journal import flush_journal
+        from main import run_tick
+        from signal_state import get_signal_tracker
+        from strategies import build_strategy_set
+        from utils import get_config
+        self.install()
+        ticks = [ts for ts in self.tape.ticks
+                 if (start is None or datetime.fromtimestamp(ts).time() >= start)
+                 and (end is None or datetime.fromtimestamp(ts).time() <= end)]
+        if not ticks:
+            raise ValueError("No recorded ticks in the requested window")
+        self.session_time = ticks[0]
+        self.horizon = ticks[0]
+        drl_trader = bootstrap(['config', 'sector_index', 'drl_trader'])['drl_trader']
+        strategies = build_strategy_set(drl_trader)
+        config = get_config()
+        tracker = get_signal_tracker() if config.get('signals', {}).get('enabled', True) else None
+        max_orders = config.get('universe', {}).get('max_orders_per_tick', 0)
+
+        latencies, lags, signals = [], [], 0
+        next_ticks = self.tape.ticks[1:] + [float('inf')]
+        following = dict(zip(self.tape.ticks, next_ticks))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for ts in ticks:
+                if self.speed > 0:
+                    target = started + (ts - ticks[0]) / self.speed
+                    delay = target - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        lags.append(-delay)
+                self.session_time, self.horizon = ts, following[ts]
+                tick_started = time.perf_counter()
+                try:
+                    futures = run_tick(executor, strategies, tracker=tracker, max_orders=max_orders,
+                                       fetch_context=self._global_context, approve=self._approved)
+                    wait(futures)
+                    signals += len(futures)
+                except Exception as e:
+                    logging.error(f"Replay tick at {datetime.fromtimestamp(ts)} failed: {e}")
+                latencies.append(time.perf_counter() - tick_started)
+        elapsed = time.perf_counter() - started
+        flush_journal()
+        return self._report(ticks, latencies, lags, signals, elapsed)
+
+    def _global_context(self):
+        return self.tape.at('global_context', None, self.horizon)
+
+    async def _approved(self, signal, explanation):
+        verdict = self.tape.at('llm', (signal['symbol'], signal['side']), self.horizon)
+        if verdict is None:
+            from gpt_engine import mock_gpt_api
+            return (await mock_gpt_api(signal, explanation))['approved']
+        return verdict
+
+    def _report(self, ticks, latencies, lags, signals, elapsed):
+        ms = np.array(latencies) * 1000
+        return {
+            'ticks': len(ticks),
+            'session_seconds': ticks[-1] - ticks[0],
+            'wall_seconds': elapsed,
+            'ticks_per_second': len(ticks) / elapsed if elapsed else 0.0,
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'p99_ms': float(np.percentile(ms, 99)),
+            'max_ms': float(ms.max()),
+            'late_ticks': len(lags),
+            'max_lag_ms': float(max(lags) * 1000) if lags else 0.0,
+            'signals': signals,
+            'orders': self.kite.orders_placed,
+            'tape_events': self.tape.events,
+            'tape_misses': self.tape.misses,
+            'journal': os.path.join(self.output_dir, 'journal'),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the live tick pipeline")
+    parser.add_argument('session', help="recording directory, e.g. data/recordings/20260105-091200")
+    parser.add_argument('--speed', type=float, default=1.0, help="1 = real time, N = N times faster, 0 = as fast as possible")
+    parser.add_argument('--from', dest='start', default=None, help="first tick to replay (HH:MM)")
+    parser.add_argument('--to', dest='end', default=None, help="last tick to replay (HH:MM)")
+    args = parser.parse_args()
+
+    from utils import configure_logging, get_config
+    configure_logging()
+    replayer = Replayer(args.session, speed=args.speed,
+                        output_dir=get_config().get('replay', {}).get('output_dir', 'data/replays'))
+    start = datetime.strptime(args.start, '%H:%M').time() if args.start else None
+    end = datetime.strptime(args.end, '%H:%M').time() if args.end else None
+    report = replayer.run(start, end)
+    print(f"Replayed {report['ticks']} ticks ({report['session_seconds']:.0f}s of session) "
+          f"in {report['wall_seconds']:.1f}s: {report['ticks_per_second']:.1f} ticks/s")
+    print(f"Tick latency p50 {report['p50_ms']:.1f}ms, p95 {report['p95_ms']:.1f}ms, "
+          f"p99 {report['p99_ms']:.1f}ms, max {report['max_ms']:.1f}ms")
+    if args.speed > 0:
+        print(f"{report['late_ticks']} ticks started late, worst by {report['max_lag_ms']:.0f}ms")
+    print(f"{report['signals']} signals reached risk checks, {report['orders']} orders placed; "
+          f"{report['tape_misses']} lookups had no recorded data")
+    print(f"Decisions journaled to {report['journal']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,97 @@
-import yaml
-from datetime import datetime, time
+from datetime import time
 import logging
-from kiteconnect import KiteConnect
+from kite_api_config import get_kite, get_rate_limiter
 from dotenv import load_dotenv
 import os
 import asyncio
-from data_fetcher import get_nifty100_symbols
-from utils import send_alert
+from utils import send_alert, get_config, session_now
+from sector_index import get_sector_index, UNKNOWN_SECTOR, UNRANKED
+from portfolio import get_ledger
+from journal import get_journal
+from signal_state import get_signal_tracker
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
-
-kite = KiteConnect(api_key=os.getenv('KITE_API_KEY'))
-kite.set_access_token(os.getenv('KITE_ACCESS_TOKEN'))
-
-with open('config.yaml', 'r') as f:
-    config = yaml.safe_load(f)
-
-SECTOR_MAPPING = {
-    'RELIANCE': 'NIFTY ENERGY',
-    'TCS': 'NIFTY IT',
-    'HDFCBANK': 'NIFTY BANK',
-    'INFY': 'NIFTY IT',
-    'HINDUNILVR': 'NIFTY FMCG',
-    'ICICIBANK': 'NIFTY BANK',
-    'SBIN': 'NIFTY BANK'
-    # Update with actual NSE sector assignments
-}
 
 def allowed(signal, global_ctx):
+    return risk_check(signal, global_ctx)[0]
+
+def risk_check(signal, global_ctx):
+    """Returns (ok, reason); reason names the first check that failed."""
     try:
+        config = get_config()
         if signal["confidence"] < config['risk']['confidence_threshold']:
-            return False
-        now = datetime.now().time()
+            return False, 'confidence'
+        now = session_now().time()
         start = time(*map(int, config['risk']['trading_hours']['start'].split(':')))
         end = time(*map(int, config['risk']['trading_hours']['end'].split(':')))
         if not (start <= now <= end):
             logging.info("Outside trading hours")
-            return False
+            return False, 'trading_hours'
         if portfolio_drawdown() > config['risk']['max_drawdown']:
             logging.warning("Max drawdown exceeded")
-            return False
+            return False, 'max_drawdown'
         if get_position_size(signal['symbol']) > config['risk']['max_position_size']:
             logging.warning(f"Position limit exceeded for {signal['symbol']}")
-            return False
+            return False, 'position_limit'
         if global_ctx['india_vix'] > config['risk']['global_context']['vix_threshold']:
             logging.warning(f"India VIX too high: {global_ctx['india_vix']}")
-            return False
+            return False, 'india_vix'
         if global_ctx['gift_nifty_change'] < -config['risk']['global_context']['gift_nifty_gap']:
             logging.warning(f"GIFT Nifty gap down: {global_ctx['gift_nifty_change']:.2%}")
-            return False
+            return False, 'gift_nifty_gap'
         for name, change in global_ctx['us_futures_changes'].items():
             if change < -config['risk']['global_context']['us_futures_gap']:
                 logging.warning(f"{name} futures gap down: {change:.2%}")
-                return False
+                return False, 'us_futures_gap'
         for name, change in global_ctx['asian_markets_changes'].items():
             if change < -config['risk']['global_context']['asian_markets_gap']:
                 logging.warning(f"{name} market gap down: {change:.2%}")
-                return False
+                return False, 'asian_markets_gap'
         if global_ctx['usdinr_change'] > config['risk']['global_context']['usdinr_change']:
             logging.warning(f"USD/INR change too high: {global_ctx['usdinr_change']:.2%}")
-            return False
+            return False, 'usdinr_change'
         symbol = signal['symbol']
-        if symbol not in SECTOR_MAPPING:
+        sector = signal.get('sector') or get_sector_index().sector_of(symbol)
+        if sector == UNKNOWN_SECTOR:
             logging.warning(f"No sector mapping for {symbol}")
-            return False
-        sector = SECTOR_MAPPING[symbol]
-        if sector not in global_ctx['top_sectors']:
+            return False, 'unknown_sector'
+        if sector_rank(signal, sector, global_ctx) > config['risk']['global_context']['sector_rank_threshold']:
             logging.warning(f"{symbol} not in top sectors: {global_ctx['top_sectors']}")
-            return False
-        return True
+            return False, 'sector_rank'
+        return True, None
     except Exception as e:
         logging.error(f"Risk check error: {e}")
         asyncio.run(send_alert(f"Risk check error: {e}", error=True))
-        return False
+        return False, 'error'
+
+def cap_signals(signals, features, limit):
+    """Keep at most `limit` buy/sell signals per tick across the whole universe, most confident first."""
+    if not limit:
+        return signals, features
+    actionable = [i for i, signal in enumerate(signals) if signal['side'] != 'hold']
+    if len(actionable) <= limit:
+        return signals, features
+    keep = set(sorted(actionable, key=lambda i: signals[i]['confidence'], reverse=True)[:limit])
+    logging.info(f"Order cap: keeping {limit} of {len(actionable)} actionable signals this tick")
+    for i in actionable:
+        if i not in keep:
+            get_journal().record(event='decision', symbol=signals[i]['symbol'], side=signals[i]['side'],
+                                 confidence=signals[i]['confidence'], outcome='rejected', reason='order_cap')
+    rows = [i for i in range(len(signals)) if i in keep or signals[i]['side'] == 'hold']
+    return [signals[i] for i in rows], features[rows]
+
+def sector_rank(signal, sector, global_ctx):
+    if signal.get('sector_rank') is not None:
+        return signal['sector_rank']
+    strength = global_ctx['sector_strength']
+    ranked = sorted(strength, key=strength.get, reverse=True)
+    return ranked.index(sector) + 1 if sector in ranked else UNRANKED
 
 def portfolio_drawdown():
     try:
-        positions = kite.positions()
+        positions = get_kite().positions()
         total_pnl = sum(pos['pnl'] for pos in positions['day'])
-        historical_high = 1000000  # Replace with your portfolio's historical high
-        return max(0, (historical_high - total_pnl) / historical_high)
+        return get_ledger().mark_equity(get_ledger().capital + total_pnl)
     except Exception as e:
         logging.error(f"Portfolio drawdown calculation error: {e}")
         asyncio.run(send_alert(f"Portfolio drawdown calculation error: {e}", error=True))
@@ -88,7 +99,7 @@ def portfolio_drawdown():
 
 def get_position_size(symbol):
     try:
-        positions = kite.positions()
+        positions = get_kite().positions()
         return sum(pos['quantity'] for pos in positions['day'] if pos['tradingsymbol'] == symbol)
     except Exception as e:
         logging.error(f"Position size calculation error for {symbol}: {e}")
@@ -97,13 +108,14 @@ def get_position_size(symbol):
 
 def force_exit_positions():
     try:
-        positions = kite.positions()
+        positions = get_kite().positions()
         open_positions = [pos for pos in positions['day'] if pos['quantity'] != 0]
         for pos in open_positions:
             symbol = pos['tradingsymbol']
             quantity = abs(pos['quantity'])
             transaction_type = 'SELL' if pos['quantity'] > 0 else 'BUY'
-            kite.place_order(
+            get_rate_limiter('orders').acquire()
+            order_id = get_kite().place_order(
                 variety='regular',
                 exchange='NSE',
                 tradingsymbol=symbol,
@@ -112,8 +124,13 @@ def force_exit_positions():
                 product='MIS',
                 order_type='MARKET'
             )
+            get_ledger().record_order(order_id, symbol, transaction_type.lower(), quantity)
+            get_journal().record(event='force_exit', symbol=symbol, side=transaction_type.lower(), quantity=quantity,
+                                 price=pos.get('last_price'), order_id=order_id, outcome='executed')
             logging.info(f"Force exited {transaction_type} for {symbol}, quantity: {quantity}")
             asyncio.run(send_alert(f"Force exited {transaction_type} for {symbol}, quantity: {quantity}"))
+        # Flat book: the next entry on any symbol should be a fresh edge, not suppressed by a stale latch.
+        get_signal_tracker().reset()
         if not open_positions:
             logging.info("No open positions to force exit")
             asyncio.run(send_alert("No open positions to force exit at 15:15 IST"))
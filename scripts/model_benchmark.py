@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_trader.drl_agent import DRLTrader
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-batch DRL inference latency with the rule-based fallback")
+    parser.add_argument('--model', default='models/drl_legend.pt')
+    parser.add_argument('--quantize', action='store_true')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for rows in args.batch_sizes:
+        trader = DRLTrader(model_path=args.model, quantize=args.quantize, num_threads=args.threads)
+        features = rng.normal(50.0, 20.0, size=(rows, 12)).astype(np.float32)
+        symbols = [f'SYM{i}' for i in range(rows)]
+        for _ in range(args.iterations):
+            if trader.model:
+                trader.decide_batch(features, symbols)
+            trader.fallback_batch(features, symbols)
+        print(f"batch={rows}")
+        for path, stats in trader.latency_report().items():
+            print(f"  {path:<9} p50 {stats['p50_ms']:.3f}ms  p95 {stats['p95_ms']:.3f}ms  "
+                  f"max {stats['max_ms']:.3f}ms  {stats['us_per_row']:.1f}us/row")
+
+if __name__ == "__main__":
+    main()
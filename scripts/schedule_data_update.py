@@ -2,11 +2,9 @@ import schedule
 import time
 from data_fetcher import fetch_nifty100_data
 import logging
-from utils import send_alert
+from utils import send_alert, configure_logging
 import asyncio
 
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
-
 def update_nifty100_data():
     try:
         fetch_nifty100_data(save_to_csv=True)
@@ -15,8 +13,9 @@ def update_nifty100_data():
         logging.error(f"Scheduled data update failed: {e}")
         asyncio.run(send_alert(f"Scheduled data update failed: {e}", error=True))
 
-schedule.every().day.at("08:00").do(update_nifty100_data)
-
-while True:
-    schedule.run_pending()
-    time.sleep(60)
+if __name__ == "__main__":
+    configure_logging()
+    schedule.every().day.at("08:00").do(update_nifty100_data)
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
@@ -0,0 +1,54 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = [
+    'utils', 'kite_api_config', 'risk_engine', 'gpt_engine', 'strategy_engine',
+    'data_fetcher', 'global_context', 'kite_api', 'ai_trader.drl_agent', 'bootstrap', 'main',
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+BOOTSTRAP_SNIPPET = (
+    "import time; t = time.perf_counter(); from bootstrap import bootstrap, startup_timings; "
+    "bootstrap(); print(time.perf_counter() - t); print(startup_timings)"
+)
+
+def run_snippet(snippet):
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'failed')
+    return result.stdout.strip().splitlines()
+
+def benchmark_imports(modules, repeat):
+    report = {}
+    for module in modules:
+        try:
+            samples = [float(run_snippet(IMPORT_SNIPPET.format(module=module))[0]) for _ in range(repeat)]
+            report[module] = statistics.median(samples)
+        except Exception as e:
+            report[module] = e
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import and bootstrap time")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--bootstrap', action='store_true', help="also run the full bootstrap (needs network and credentials)")
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args()
+
+    for module, result in benchmark_imports(args.modules, args.repeat).items():
+        if isinstance(result, Exception):
+            print(f"{module:<22} import failed: {result}")
+        else:
+            print(f"{module:<22} {result * 1000:8.1f} ms")
+
+    if args.bootstrap:
+        lines = run_snippet(BOOTSTRAP_SNIPPET)
+        print(f"{'bootstrap':<22} {float(lines[0]) * 1000:8.1f} ms")
+        print(lines[1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_trader.trainer import evaluate, export_model, train
+from ai_trader.training_env import build_training_data
+from param_sweep import load_history
+from utils import configure_logging, get_config
+
+def main():
+    config = get_config().get('training', {})
+    parser = argparse.ArgumentParser(description="Train the DRL policy on the local minute history and export it for DRLTrader")
+    parser.add_argument('--data', default=config.get('data', 'data/nifty100.csv'))
+    parser.add_argument('--output', default=config.get('output', get_config().get('model', {}).get('path', 'models/drl_legend.pt')))
+    parser.add_argument('--envs', type=int, default=config.get('envs', 1024))
+    parser.add_argument('--rollout', type=int, default=config.get('rollout', 32))
+    parser.add_argument('--updates', type=int, default=config.get('updates', 500))
+    parser.add_argument('--lr', type=float, default=config.get('lr', 3e-4))
+    parser.add_argument('--hidden', type=int, default=config.get('hidden', 64))
+    parser.add_argument('--cost-bps', type=float, default=config.get('cost_bps', 3.0))
+    parser.add_argument('--validation-days', type=int, default=config.get('validation_days', 5))
+    parser.add_argument('--threads', type=int, default=config.get('threads', os.cpu_count() or 1))
+    parser.add_argument('--seed', type=int, default=config.get('seed', 0))
+    parser.add_argument('--no-export', action='store_true')
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    start = time.perf_counter()
+    data = build_training_data(load_history(args.data), config.get('exit_time', '15:15'))
+    bounds = data['day_bounds']
+    holdout = min(args.validation_days, len(bounds) - 1)
+    train_bounds, validation_bounds = bounds[:len(bounds) - holdout], bounds[len(bounds) - holdout:]
+    print(f"{len(data['symbols'])} symbols, {len(train_bounds)} training and {len(validation_bounds)} validation sessions "
+          f"({time.perf_counter() - start:.1f}s to load)")
+
+    model = train(data, train_bounds, n_envs=args.envs, rollout=args.rollout, updates=args.updates, lr=args.lr,
+                  cost_bps=args.cost_bps, hidden=args.hidden, seed=args.seed)
+    for name, session_bounds in (('train', train_bounds), ('validation', validation_bounds)):
+        stats = evaluate(model, data, session_bounds, args.cost_bps)
+        print(f"{name:<10} {stats['sessions']} symbol-sessions  mean {stats['mean_bps']:.1f}bps/session  "
+              f"hit rate {stats['hit_rate']:.1%}  {stats['trades']} trades")
+    if not args.no_export:
+        export_model(model, args.output)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+import numpy as np
+from utils import get_config
+from nse_client import get_index_data, nse_ttl
+
+SECTOR_INDEX_FILE = 'data/sector_index.json'
+UNKNOWN_SECTOR = 'Unknown'
+UNRANKED = 999
+
+# Checked in order; a symbol listed in several sectoral indices gets the first one.
+DEFAULT_SECTOR_INDICES = [
+    'NIFTY BANK', 'NIFTY IT', 'NIFTY AUTO', 'NIFTY PHARMA', 'NIFTY FMCG', 'NIFTY METAL',
+    'NIFTY ENERGY', 'NIFTY OIL & GAS', 'NIFTY REALTY', 'NIFTY MEDIA', 'NIFTY CONSUMER DURABLES',
+    'NIFTY HEALTHCARE INDEX', 'NIFTY FINANCIAL SERVICES', 'NIFTY PSU BANK', 'NIFTY PRIVATE BANK',
+]
+
+FALLBACK_SECTOR_MAPPING = {
+    'RELIANCE': 'NIFTY ENERGY',
+    'TCS': 'NIFTY IT',
+    'HDFCBANK': 'NIFTY BANK',
+    'INFY': 'NIFTY IT',
+    'HINDUNILVR': 'NIFTY FMCG',
+    'ICICIBANK': 'NIFTY BANK',
+    'SBIN': 'NIFTY BANK'
+}
+
+class SectorIndex:
+    def __init__(self, mapping, sectors, as_of=None, stale=False):
+        self.mapping = mapping
+        self.sectors = list(sectors)
+        self.as_of = as_of
+        self.stale = stale
+        self.built_at = time.monotonic()
+        self._codes = {name: i for i, name in enumerate(self.sectors)}
+        self._names = np.array(self.sectors + [UNKNOWN_SECTOR], dtype=object)
+        self._universe_codes = ((), np.empty(0, dtype=np.int32))
+
+    def sector_of(self, symbol):
+        return self.mapping.get(symbol, UNKNOWN_SECTOR)
+
+    def codes(self, symbols):
+        symbols = tuple(symbols)
+        universe, codes = self._universe_codes
+        if symbols != universe:
+            unknown = len(self.sectors)
+            codes = np.array([self._codes.get(self.mapping.get(s), unknown) for s in symbols], dtype=np.int32)
+            self._universe_codes = (symbols, codes)
+        return codes
+
+    def sector_features(self, symbols, sector_strength, returns=None):
+        codes = self.codes(symbols)
+        n_sectors = len(self.sectors)
+        strength = np.array([sector_strength.get(name, 0.0) for name in self.sectors] + [0.0])
+        ranked = sorted(sector_strength, key=sector_strength.get, reverse=True)
+        position = {name: i + 1 for i, name in enumerate(ranked)}
+        rank = np.array([position.get(name, UNRANKED) for name in self.sectors] + [UNRANKED], dtype=np.int32)
+        features = {
+            'sector_code': codes,
+            'sector': self._names[codes],
+            'sector_strength': strength[codes],
+            'sector_rank': rank[codes],
+        }
+        if returns is not None:
+            returns = np.asarray(returns, dtype=np.float64)
+            counts = np.bincount(codes, minlength=n_sectors + 1)
+            sums = np.bincount(codes, weights=returns, minlength=n_sectors + 1)
+            sumsq = np.bincount(codes, weights=returns * returns, minlength=n_sectors + 1)
+            mean = sums / np.maximum(counts, 1)
+            std = np.sqrt(np.maximum(sumsq / np.maximum(counts, 1) - mean * mean, 0.0))
+            safe_std = np.where(std > 0, std, 1.0)
+            features['relative_strength'] = returns - features['sector_strength']
+            features['sector_zscore'] = np.where(std[codes] > 0, (returns - mean[codes]) / safe_std[codes], 0.0)
+        return features
+
+def fetch_sector_mapping(sector_indices):
+    mapping = {}
+    for index_name in sector_indices:
+        try:
+            data = get_index_data(index_name, ttl=nse_ttl('constituents', 86400))
+            for item in data['data']:
+                if item['symbol'] != index_name:
+                    mapping.setdefault(item['symbol'], index_name)
+        except Exception as e:
+            logging.error(f"Error fetching constituents of {index_name}: {e}")
+    return mapping
+
+def _read_cache():
+    try:
+        with open(SECTOR_INDEX_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_sector_index():
+    sectors = get_config().get('sectors', {}).get('indices', DEFAULT_SECTOR_INDICES)
+    today = date.today().isoformat()
+    cached = _read_cache()
+    if cached and cached.get('date') == today and cached.get('sectors') == sectors:
+        return SectorIndex(cached['mapping'], sectors, as_of=today)
+    try:
+        mapping = fetch_sector_mapping(sectors)
+        if not mapping:
+            raise ValueError("no sector constituents returned")
+        os.makedirs(os.path.dirname(SECTOR_INDEX_FILE), exist_ok=True)
+        with open(SECTOR_INDEX_FILE, 'w') as f:
+            json.dump({'date': today, 'sectors': sectors, 'mapping': mapping}, f)
+        logging.info(f"Built sector index for {len(mapping)} symbols across {len(sectors)} sectors")
+        return SectorIndex(mapping, sectors, as_of=today)
+    except Exception as e:
+        logging.error(f"Error building sector index: {e}")
+        if cached:
+            logging.warning(f"Using sector index from {cached.get('date')}")
+            return SectorIndex(cached['mapping'], cached.get('sectors', sectors), as_of=today, stale=True)
+        logging.warning("Using fallback sector mapping")
+        return SectorIndex(FALLBACK_SECTOR_MAPPING, sectors, as_of=today, stale=True)
+
+STALE_RETRY_SECONDS = 900
+
+_sector_index = None
+_sector_index_lock = threading.Lock()
+
+def _needs_rebuild(index):
+    if index is None or index.as_of != date.today().isoformat():
+        return True
+    return index.stale and time.monotonic() - index.built_at > STALE_RETRY_SECONDS
+
+def get_sector_index():
+    global _sector_index
+    if _needs_rebuild(_sector_index):
+        with _sector_index_lock:
+            if _needs_rebuild(_sector_index):
+                _sector_index = build_sector_index()
+    return _sector_index
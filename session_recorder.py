@@ -0,0 +1,182 @@
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from utils import get_config
+
+RECORDING_MAGIC = b'TREC'
+RECORDING_VERSION = 1
+RECORDING_DIR_ENV = 'TRADER_RECORDING_DIR'
+_FILE_HEADER = struct.Struct('>4sH')
+_FRAME_HEADER = struct.Struct('>I')
+
+# Set by a universe shard so each process appends to its own file in the session directory.
+recording_suffix = ''
+
+class RecordedError(Exception):
+    """A broker call that raised during recording; a replay raises it again at the same point."""
+
+class SessionRecorder:
+    """Append-only log of everything the bot consumed, as (timestamp, kind, key, pickled payload) events.
+
+    Events are buffered and written as length-prefixed zlib frames, so a crash loses at most the
+    last `flush_interval` seconds and a reader stops cleanly at a truncated final frame.
+    """
+
+    def __init__(self, path, flush_events=512, flush_interval=1.0):
+        self.path = path
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        new = not os.path.exists(path)
+        self._file = open(path, 'ab')
+        if new:
+            self._file.write(_FILE_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION))
+        self._events = []
+        self._last_payloads = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, kind, key, payload, dedupe=False):
+        """Pickle `payload` now, so later mutation by the caller cannot change what was recorded.
+
+        With `dedupe`, a payload that is the very object last recorded under (kind, key), such
+        as a cache hit, is skipped.
+        """
+        ts = time.time()
+        if dedupe:
+            with self._lock:
+                if self._last_payloads.get((kind, key)) is payload:
+                    return
+                self._last_payloads[(kind, key)] = payload
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._events.append((ts, kind, key, data))
+            if len(self._events) >= self.flush_events or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._events or self._file.closed:
+            return
+        try:
+            frame = zlib.compress(pickle.dumps(self._events, protocol=pickle.HIGHEST_PROTOCOL), 6)
+            self._file.write(_FRAME_HEADER.pack(len(frame)) + frame)
+            self._file.flush()
+        except Exception as e:
+            logging.error(f"Error writing session recording {self.path}: {e}")
+        self._events = []
+
+class RecordingKite:
+    """Proxy for KiteConnect that records every method's response, or the error it raised."""
+
+    def __init__(self, kite, recorder):
+        self._kite = kite
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._kite, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            key = call_key(name, args, kwargs)
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                self._recorder.record('kite', key, RecordedError(f"{type(e).__name__}: {e}"))
+                raise
+            self._recorder.record('kite', key, result)
+            return result
+        return call
+
+def call_key(method, args, kwargs):
+    """How a broker call is looked up on replay: quotes and historical data by instrument and
+    interval (their date arguments follow the clock), orders by symbol and side, anything else
+    by its exact arguments."""
+    if method in ('ltp', 'quote', 'ohlc'):
+        return (method,)
+    if method == 'historical_data':
+        params = dict(zip(('instrument_token', 'from_date', 'to_date', 'interval'), args), **kwargs)
+        return (method, params.get('instrument_token'), params.get('interval'))
+    if method == 'place_order':
+        return (method, kwargs.get('tradingsymbol'), kwargs.get('transaction_type'))
+    return (method, repr(args), repr(sorted(kwargs.items())))
+
+def read_recording(path):
+    """Yield (ts, kind, key, pickled payload) events; a torn final frame ends the stream."""
+    with open(path, 'rb') as f:
+        magic, version = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError(f"{path} is not a session recording")
+        while True:
+            header = f.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            frame = f.read(_FRAME_HEADER.unpack(header)[0])
+            try:
+                events = pickle.loads(zlib.decompress(frame))
+            except Exception:
+                logging.warning(f"Truncated frame at the end of {path}; stopping there")
+                return
+            yield from events
+
+_recorder = None
+_recorder_ready = False
+_recorder_lock = threading.Lock()
+
+def get_recorder():
+    """The process's recorder, or None when `recording.enabled` is off or recording was disabled."""
+    global _recorder, _recorder_ready
+    if not _recorder_ready:
+        with _recorder_lock:
+            if not _recorder_ready:
+                config = get_config().get('recording', {})
+                if config.get('enabled', False):
+                    # Shards inherit the directory through the environment, so one session stays in one place.
+                    session_dir = os.environ.get(RECORDING_DIR_ENV) or os.path.join(
+                        config.get('dir', 'data/recordings'), datetime.now().strftime('%Y%m%d-%H%M%S'))
+                    os.environ[RECORDING_DIR_ENV] = session_dir
+                    _recorder = SessionRecorder(
+                        os.path.join(session_dir, f'session{recording_suffix}.rec'),
+                        flush_events=config.get('flush_events', 512),
+                        flush_interval=config.get('flush_interval', 1.0)
+                    )
+                    logging.info(f"Recording session inputs to {_recorder.path}")
+                _recorder_ready = True
+    return _recorder
+
+def disable_recording():
+    global _recorder, _recorder_ready
+    with _recorder_lock:
+        _recorder, _recorder_ready = None, True
+
+def record(kind, key, payload, dedupe=False):
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.record(kind, key, payload, dedupe=dedupe)
+
+def wrap_kite(kite):
+    recorder = get_recorder()
+    return RecordingKite(kite, recorder) if recorder is not None else kite
+
+def flush_recording():
+    if _recorder is not None:
+        _recorder.flush()
+
+def close_recording():
+    if _recorder is not None:
+        _recorder.close()
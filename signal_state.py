@@ -0,0 +1,160 @@
+import logging
+import threading
+from utils import session_now
+
+HOLD = 'hold'
+
+class _SymbolState:
+    __slots__ = ('side', 'pending_side', 'pending_ticks', 'exit_ticks', 'last_emitted', 'deferred')
+
+    def __init__(self):
+        self.side = HOLD
+        self.pending_side = HOLD
+        self.pending_ticks = 0
+        self.exit_ticks = 0
+        self.last_emitted = float('-inf')
+        self.deferred = False
+
+class SignalTracker:
+    """Latches each symbol's raw per-tick decision into a buy/sell/hold state and passes a signal
+    downstream only when that state changes.
+
+    A symbol enters buy or sell after `confirm_ticks` consecutive ticks at `enter_confidence` or
+    above, and stays there until the model disagrees (another side, or confidence under
+    `exit_confidence`) for `exit_ticks` consecutive ticks. No symbol emits twice within `cooldown`
+    seconds; with `repeat_after` set, a state that persists is re-emitted at that interval.
+
+    Callers report signals that were not traded: defer(symbol) after a rejection keeps the state
+    latched and re-emits it once `cooldown` has passed, release(symbol) after a failed order
+    unlatches it so the symbol can enter again after the cooldown.
+    """
+
+    def __init__(self, enter_confidence=0.65, exit_confidence=0.55, confirm_ticks=1, exit_ticks=3,
+                 cooldown=60.0, repeat_after=0.0):
+        self.enter_confidence = enter_confidence
+        self.exit_confidence = exit_confidence
+        self.confirm_ticks = max(1, confirm_ticks)
+        self.exit_ticks = max(1, exit_ticks)
+        self.cooldown = cooldown
+        self.repeat_after = repeat_after
+        self.emitted = 0
+        self.suppressed = 0
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def filter(self, signals, features, now=None):
+        """Return only the signals (and their feature rows) that should run through risk, LLM and execution."""
+        now = session_now().timestamp() if now is None else now
+        keep = []
+        with self._lock:
+            for i, signal in enumerate(signals):
+                state = self._states.get(signal['symbol'])
+                if state is None:
+                    state = self._states[signal['symbol']] = _SymbolState()
+                if self._step(state, signal['side'], signal['confidence'], now):
+                    keep.append(i)
+            self.emitted += len(keep)
+            self.suppressed += len(signals) - len(keep)
+        if len(keep) == len(signals):
+            return signals, features
+        return [signals[i] for i in keep], features[keep]
+
+    def _step(self, state, side, confidence, now):
+        if state.side != HOLD:
+            if side == state.side and confidence >= self.exit_confidence:
+                state.exit_ticks = 0
+                if ((state.deferred and now - state.last_emitted >= self.cooldown)
+                        or (self.repeat_after and now - state.last_emitted >= self.repeat_after)):
+                    state.last_emitted, state.deferred = now, False
+                    return True
+                return False
+            state.exit_ticks += 1
+            if state.exit_ticks < self.exit_ticks:
+                return False
+            state.side, state.exit_ticks, state.deferred = HOLD, 0, False
+
+        if side == HOLD or confidence < self.enter_confidence:
+            state.pending_side, state.pending_ticks = HOLD, 0
+            return False
+        if side == state.pending_side:
+            state.pending_ticks += 1
+        else:
+            state.pending_side, state.pending_ticks = side, 1
+        if state.pending_ticks < self.confirm_ticks or now - state.last_emitted < self.cooldown:
+            return False
+        state.side, state.pending_side, state.pending_ticks = side, HOLD, 0
+        state.last_emitted = now
+        return True
+
+    def positions(self):
+        with self._lock:
+            return {symbol: state.side for symbol, state in self._states.items()
+                    if state.side != HOLD and not state.deferred}
+
+    def defer(self, symbol):
+        """The last signal for `symbol` was rejected: keep it latched and emit it again after the cooldown."""
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is not None and state.side != HOLD:
+                state.deferred = True
+
+    def release(self, symbol):
+        """The order for `symbol` failed: unlatch it, keeping the cooldown from its last emission."""
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is not None:
+                state.side, state.exit_ticks, state.deferred = HOLD, 0, False
+
+    def reset(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(symbol, None)
+
+    def stats(self):
+        with self._lock:
+            emitted, suppressed = self.emitted, self.suppressed
+            self.emitted = self.suppressed = 0
+        return {'emitted': emitted, 'suppressed': suppressed, 'latched': len(self.positions())}
+
+    def state(self):
+        with self._lock:
+            return {symbol: (s.side, s.pending_side, s.pending_ticks, s.exit_ticks, s.last_emitted, s.deferred)
+                    for symbol, s in self._states.items()}
+
+    def restore(self, state):
+        with self._lock:
+            for symbol, values in state.items():
+                restored = self._states[symbol] = _SymbolState()
+                (restored.side, restored.pending_side, restored.pending_ticks,
+                 restored.exit_ticks, restored.last_emitted, *deferred) = values
+                restored.deferred = bool(deferred and deferred[0])
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_signal_tracker():
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                from utils import get_config
+                config = get_config()
+                signals = config.get('signals', {})
+                _tracker = SignalTracker(
+                    enter_confidence=signals.get('enter_confidence', config['risk']['confidence_threshold']),
+                    exit_confidence=signals.get('exit_confidence', 0.55),
+                    confirm_ticks=signals.get('confirm_ticks', 1),
+                    exit_ticks=signals.get('exit_ticks', 3),
+                    cooldown=signals.get('cooldown', 60.0),
+                    repeat_after=signals.get('repeat_after', 0.0)
+                )
+    return _tracker
+
+def log_signal_stats():
+    stats = get_signal_tracker().stats()
+    total = stats['emitted'] + stats['suppressed']
+    if total:
+        logging.info(f"Signal tracker: {stats['emitted']} of {total} signals passed downstream "
+                     f"({stats['suppressed'] / total:.1%} held), {stats['latched']} symbols latched")
@@ -0,0 +1,156 @@
+import logging
+import time
+import numpy as np
+from ai_trader.drl_agent import ACTIONS
+from ai_trader.model_server import LatencyStats
+
+HOLD, BUY, SELL = 0, 1, 2
+STRATEGIES = {}
+
+def strategy(name):
+    """Register `fn(features, context)` under `name`.
+
+    `features` is the tick's N x F matrix in strategy_engine.FEATURE_NAMES order. The function
+    returns `(sides, confidence)` arrays of length N, sides coded like ACTIONS, and may add a third
+    array of position sizes; without one, size follows confidence.
+    """
+    def register(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return register
+
+@strategy('drl')
+def drl_strategy(features, context):
+    return context['drl_trader'].decide_arrays(features)
+
+@strategy('rsi')
+def rsi_strategy(features, context):
+    rsi = features[:, 3]
+    sides = np.where(rsi > context.get('rsi_sell', 70), SELL, np.where(rsi < context.get('rsi_buy', 30), BUY, HOLD))
+    return sides, np.where(sides == HOLD, 0.5, 0.7)
+
+@strategy('macd_trend')
+def macd_trend_strategy(features, context):
+    ema_fast, ema_slow, macd, rsi, atr = features[:, 0], features[:, 1], features[:, 2], features[:, 3], features[:, 8]
+    up = (ema_fast > ema_slow) & (macd > 0) & (rsi < context.get('rsi_sell', 70))
+    down = (ema_fast < ema_slow) & (macd < 0) & (rsi > context.get('rsi_buy', 30))
+    sides = np.where(up, BUY, np.where(down, SELL, HOLD))
+    spread = np.divide(np.abs(ema_fast - ema_slow), atr, out=np.zeros(len(features)), where=atr > 0)
+    return sides, np.where(sides == HOLD, 0.5, 0.5 + 0.45 * np.minimum(1.0, spread))
+
+class Ensemble:
+    """Combines member strategies row by row.
+
+    `vote` picks the side with the largest weighted vote and falls back to hold when it ties or
+    carries less than `min_agreement` of the total weight; confidence is the weighted mean of its
+    supporters. `average` scores every side with each member's confidence (the remainder split
+    over the other two sides) and picks the best score.
+    """
+
+    def __init__(self, name, members, method='vote', weights=None, min_agreement=0.5):
+        if method not in ('vote', 'average'):
+            raise ValueError(f"Unknown ensemble method {method} for {name}")
+        self.name = name
+        self.members = list(members)
+        self.method = method
+        self.weights = np.array([(weights or {}).get(m, 1.0) for m in self.members], dtype=np.float64)
+        self.min_agreement = min_agreement
+
+    def combine(self, results):
+        sides = np.stack([results[m][0] for m in self.members])
+        confidence = np.stack([results[m][1] for m in self.members])
+        onehot = sides[:, :, None] == np.arange(len(ACTIONS))
+        weights = self.weights[:, None, None]
+        rows = np.arange(sides.shape[1])
+        if self.method == 'average':
+            scores = (weights * np.where(onehot, confidence[:, :, None], (1.0 - confidence[:, :, None]) / 2)).sum(axis=0)
+            scores /= self.weights.sum()
+            winner = scores.argmax(axis=1)
+            return winner, scores[rows, winner]
+        votes = (weights * onehot).sum(axis=0)
+        winner = votes.argmax(axis=1)
+        support = votes[rows, winner]
+        agreeing = (weights[:, :, 0] * onehot[:, rows, winner] * confidence).sum(axis=0) / support
+        tied = (votes == support[:, None]).sum(axis=1) > 1
+        agreed = (support >= self.min_agreement * self.weights.sum()) & ~tied
+        return np.where(agreed, winner, HOLD), np.where(agreed, agreeing, 0.5)
+
+class StrategySet:
+    """Evaluates the trading strategy and any shadow strategies over one shared feature matrix per tick.
+
+    Each strategy, ensemble member included, runs at most once per tick and is timed separately.
+    Shadow strategies never trade: a change in one of their per-symbol decisions is only logged.
+    """
+
+    def __init__(self, active, shadow=(), ensembles=None, context=None):
+        self.ensembles = {name: Ensemble(name, **spec) for name, spec in (ensembles or {}).items()}
+        self.active = active
+        self.shadow = [name for name in shadow if name != active]
+        self.context = context or {}
+        for name in [active, *self.shadow, *(m for e in self.ensembles.values() for m in e.members)]:
+            if name not in STRATEGIES and name not in self.ensembles:
+                raise ValueError(f"Unknown strategy {name}")
+        self.latencies = LatencyStats(paths=list(STRATEGIES) + list(self.ensembles))
+        self._shadow_symbols = []
+        self._shadow_last = {}
+
+    def evaluate(self, features, names=None):
+        results = {}
+        for name in names or [self.active, *self.shadow]:
+            self._run(name, features, results)
+        return results
+
+    def signals(self, features, symbols):
+        results = self.evaluate(features)
+        sides, confidence, size = results[self.active]
+        if self.shadow:
+            self._log_shadow(symbols, results)
+        return [{"side": ACTIONS[a], "size": s, "confidence": c, "symbol": symbol, "strategy": self.active}
+                for a, c, s, symbol in zip(sides.tolist(), confidence.tolist(), size.tolist(), symbols)]
+
+    def latency_report(self):
+        return self.latencies.report()
+
+    def _run(self, name, features, results):
+        if name in results:
+            return results[name]
+        ensemble = self.ensembles.get(name)
+        if ensemble:
+            for member in ensemble.members:
+                self._run(member, features, results)
+        start = time.perf_counter()
+        output = ensemble.combine(results) if ensemble else STRATEGIES[name](features, self.context)
+        sides, confidence = np.asarray(output[0]), np.asarray(output[1], dtype=np.float64)
+        size = np.asarray(output[2], dtype=np.float64) if len(output) > 2 else np.where(sides == HOLD, 0.0, np.minimum(1.0, confidence))
+        self.latencies.record(name, time.perf_counter() - start, len(features))
+        results[name] = (sides, confidence, size)
+        return results[name]
+
+    def _log_shadow(self, symbols, results):
+        if symbols != self._shadow_symbols:
+            previous = dict(zip(self._shadow_symbols, range(len(self._shadow_symbols))))
+            positions = np.array([previous.get(s, -1) for s in symbols], dtype=np.int64)
+            for name, last in self._shadow_last.items():
+                self._shadow_last[name] = np.where(positions >= 0, last[positions], HOLD) if len(last) else np.zeros(len(symbols), dtype=np.int64)
+            self._shadow_symbols = list(symbols)
+        active = results[self.active][0]
+        for name in self.shadow:
+            sides, confidence, _ = results[name]
+            last = self._shadow_last.get(name)
+            changed = np.flatnonzero(sides != (last if last is not None else HOLD))
+            self._shadow_last[name] = sides
+            for i in changed:
+                logging.info(f"Shadow {name}: {ACTIONS[int(sides[i])].upper()} {symbols[i]} "
+                             f"confidence {confidence[i]:.2f} ({self.active}: {ACTIONS[int(active[i])]})")
+
+def build_strategy_set(drl_trader):
+    from utils import get_config
+    config = get_config()
+    strategies = config.get('strategies', {})
+    context = dict(config.get('strategy', {}), drl_trader=drl_trader)
+    return StrategySet(
+        active=strategies.get('active', 'drl'),
+        shadow=strategies.get('shadow', []),
+        ensembles=strategies.get('ensembles', {}),
+        context=context
+    )
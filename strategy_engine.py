@@ -1,49 +1,62 @@
-from sklearn.preprocessing import StandardScaler
 import numpy as np
 import logging
 import asyncio
 from utils import send_alert
+from sector_index import get_sector_index
 
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
-scaler = StandardScaler()
+FEATURE_NAMES = (
+    'ema_fast', 'ema_slow', 'macd', 'rsi', 'volume', 'india_vix', 'sector_strength',
+    'gift_nifty_change', 'atr', 'usdinr_change', 'us_futures_change', 'asian_markets_change'
+)
+TICK_COLUMNS = {'ema_fast': 0, 'ema_slow': 1, 'macd': 2, 'rsi': 3, 'volume': 4, 'atr': 8}
+SECTOR_COLUMN = 6
 
-SECTOR_MAPPING = {
-    'RELIANCE': 'NIFTY ENERGY',
-    'TCS': 'NIFTY IT',
-    'HDFCBANK': 'NIFTY BANK',
-    'INFY': 'NIFTY IT',
-    'HINDUNILVR': 'NIFTY FMCG',
-    'ICICIBANK': 'NIFTY BANK',
-    'SBIN': 'NIFTY BANK'
-    # Update with actual NSE sector assignments
-}
+def context_features(global_ctx):
+    row = np.zeros(len(FEATURE_NAMES))
+    row[5] = global_ctx.get('india_vix', 0.0)
+    row[7] = global_ctx.get('gift_nifty_change', 0.0)
+    row[9] = global_ctx.get('usdinr_change', 0.0)
+    row[10] = sum(global_ctx['us_futures_changes'].values()) / len(global_ctx['us_futures_changes'])
+    row[11] = sum(global_ctx['asian_markets_changes'].values()) / len(global_ctx['asian_markets_changes'])
+    return row
 
-def get_trade_features(tick, global_ctx):
-    sector = SECTOR_MAPPING.get(tick['symbol'], 'Unknown')
-    sector_strength = global_ctx['sector_strength'].get(sector, 0.0)
+def build_feature_matrix(ticks, global_ctx, sector_index=None):
+    symbols = list(ticks)
+    matrix = np.tile(context_features(global_ctx), (len(symbols), 1))
+    for name, column in TICK_COLUMNS.items():
+        matrix[:, column] = np.array([ticks[s].get(name, 0.0) for s in symbols], dtype=np.float64)
+    opens = np.array([ticks[s].get('open') for s in symbols], dtype=np.float64)
+    closes = np.array([ticks[s].get('close') for s in symbols], dtype=np.float64)
+    returns = np.nan_to_num(np.divide(closes - opens, opens, out=np.zeros(len(symbols)), where=opens > 0))
+    sector_index = sector_index or get_sector_index()
+    sectors = sector_index.sector_features(symbols, global_ctx['sector_strength'], returns)
+    matrix[:, SECTOR_COLUMN] = sectors['sector_strength']
+
+    complete = ~np.isnan(matrix).any(axis=1)
+    if not complete.all():
+        missing = [s for s, ok in zip(symbols, complete) if not ok]
+        logging.error(f"Missing feature data for {', '.join(missing)}")
+        asyncio.run(send_alert(f"Missing feature data for {', '.join(missing)}", error=True))
+        symbols = [s for s, ok in zip(symbols, complete) if ok]
+        matrix = matrix[complete]
+        sectors = {name: values[complete] for name, values in sectors.items()}
+    return symbols, matrix, sectors
 
-    features = [
-        tick.get('ema_fast', 0.0),
-        tick.get('ema_slow', 0.0),
-        tick.get('macd', 0.0),
-        tick.get('rsi', 0.0),
-        tick.get('volume', 0.0),
-        global_ctx.get('india_vix', 0.0),
-        sector_strength,
-        global_ctx.get('gift_nifty_change', 0.0),
-        tick.get('atr', 0.0),
-        global_ctx.get('usdinr_change', 0.0),
-        sum(global_ctx['us_futures_changes'].values()) / len(global_ctx['us_futures_changes']),
-        sum(global_ctx['asian_markets_changes'].values()) / len(global_ctx['asian_markets_changes'])
-    ]
-    if any(v is None for v in features):
-        logging.error(f"Missing feature data for {tick['symbol']}")
-        asyncio.run(send_alert(f"Missing feature data for {tick['symbol']}", error=True))
+def build_signals(ticks, global_ctx, strategies):
+    symbols, features, sectors = build_feature_matrix(ticks, global_ctx)
+    if not symbols:
+        return [], features
+    signals = strategies.signals(features, symbols)
+    for i, signal in enumerate(signals):
+        signal['sector'] = sectors['sector'][i]
+        signal['sector_rank'] = int(sectors['sector_rank'][i])
+        signal['relative_strength'] = float(sectors['relative_strength'][i])
+        signal['sector_zscore'] = float(sectors['sector_zscore'][i])
+        signal['price'] = ticks[signal['symbol']].get('close')
+    return signals, features
+
+def get_trade_features(tick, global_ctx):
+    symbols, matrix, _ = build_feature_matrix({tick['symbol']: tick}, global_ctx)
+    if not symbols:
         raise ValueError("Incomplete feature data")
-    try:
-        normalized_features = scaler.fit_transform([features])[0]
-        return normalized_features.tolist()
-    except Exception as e:
-        logging.error(f"Feature normalization failed for {tick['symbol']}: {e}")
-        asyncio.run(send_alert(f"Feature normalization error for {tick['symbol']}: {e}", error=True))
-        raise
+    return matrix[0].tolist()
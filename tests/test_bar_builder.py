@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from bar_builder import BarBuilder, TS, VOLUME
+
+DAY = datetime(2026, 1, 5)
+
+def _minutes(start, end, volume=1.0):
+    times = pd.date_range(DAY.replace(hour=start[0], minute=start[1]), DAY.replace(hour=end[0], minute=end[1]), freq='1min')
+    return pd.DataFrame({'date': times, 'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5, 'volume': volume})
+
+def _feed(builder, symbol, start, end):
+    builder.update(symbol, 100.0, 1000.0, start - timedelta(seconds=1))
+    t, cumulative = start, 1000.0
+    while t <= end:
+        cumulative += 1.0
+        builder.update(symbol, 100.5, cumulative, t)
+        builder.close_elapsed(t)
+        t += timedelta(seconds=20)
+
+def _assert_unique(builder, symbol):
+    for timeframe in builder.timeframes:
+        stamps = builder.bars(symbol, timeframe)[:, TS]
+        assert len(stamps) == len(set(stamps)), timeframe
+        assert (stamps[1:] > stamps[:-1]).all(), timeframe
+
+def test_seed_then_live_updates_continue_forming_bars():
+    builder = BarBuilder()
+    builder.seed('INFY', _minutes((9, 15), (9, 20), volume=2.0))
+    _feed(builder, 'INFY', DAY.replace(hour=9, minute=21), DAY.replace(hour=9, minute=30))
+    builder.close_elapsed(DAY.replace(hour=9, minute=45))
+    _assert_unique(builder, 'INFY')
+    five = builder.bars('INFY', '5m')
+    assert [datetime.fromtimestamp(ts).minute for ts in five[:, TS]] == [15, 20, 25, 30]
+    assert five[1, VOLUME] > 2.0
+    assert len(builder.bars('INFY', '15m')) == 2
+
+def test_seed_from_previous_session_closes_on_new_day():
+    builder = BarBuilder()
+    builder.seed('INFY', _minutes((15, 20), (15, 29)).assign(date=lambda f: f['date'] - timedelta(days=1)))
+    _feed(builder, 'INFY', DAY.replace(hour=9, minute=15), DAY.replace(hour=9, minute=16))
+    _assert_unique(builder, 'INFY')
+    assert datetime.fromtimestamp(builder.bars('INFY', '5m')[-1, TS]).date() == (DAY - timedelta(days=1)).date()
+
+def test_backfill_after_restore_fills_gap_without_duplicates():
+    live = BarBuilder()
+    live.seed('INFY', _minutes((9, 15), (9, 20)))
+    _feed(live, 'INFY', DAY.replace(hour=9, minute=21), DAY.replace(hour=9, minute=40, second=30))
+    restored = BarBuilder()
+    restored.restore(live.state())
+    resume = restored.resume_time('INFY')
+    history = _minutes((9, 15), (10, 20))
+    restored.seed('INFY', history[history['date'] >= resume])
+    restored.close_elapsed(DAY.replace(hour=10, minute=45))
+    _assert_unique(restored, 'INFY')
+    one = restored.bars('INFY', '1m')[:, TS]
+    assert datetime.fromtimestamp(one[-1]) == DAY.replace(hour=10, minute=20)
+    assert (one[1:] - one[:-1] == 60).all()
+    assert len(restored.bars('INFY', '15m')) == 5
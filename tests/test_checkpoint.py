@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import checkpoint
+import data_fetcher
+from bar_builder import BarBuilder, TS
+
+def _history(start, end):
+    times = pd.date_range(start, end, freq='1min')
+    return [{'date': t, 'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5, 'volume': 5.0} for t in times]
+
+class _HistoryKite:
+    def __init__(self, end):
+        self.end = end
+        self.requests = []
+
+    def historical_data(self, instrument_token, from_date, to_date, interval):
+        self.requests.append(from_date)
+        return _history(max(pd.Timestamp(from_date), pd.Timestamp(self.end.date()) + pd.Timedelta(hours=9, minutes=15)), self.end)
+
+def test_restored_stale_symbols_are_backfilled(monkeypatch, tmp_path):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    snapshot_time, restart_time = today.replace(hour=10, minute=5, second=20), today.replace(hour=10, minute=52, second=10)
+    monkeypatch.setattr(data_fetcher, '_bar_builder', BarBuilder())
+    monkeypatch.setattr(data_fetcher, 'seeded_symbols', set())
+    monkeypatch.setattr(data_fetcher, 'bar_indicators', {})
+    kite = _HistoryKite(snapshot_time)
+    monkeypatch.setattr(data_fetcher, 'get_kite', lambda: kite)
+    monkeypatch.setattr(data_fetcher, 'session_now', lambda: snapshot_time)
+    data_fetcher.seed_bars('INFY', 1)
+    data_fetcher.seeded_symbols.add('INFY')
+    path = str(tmp_path / 'state.bin')
+    checkpoint.save_checkpoint(path, include_portfolio=False)
+
+    monkeypatch.setattr(data_fetcher, '_bar_builder', BarBuilder())
+    monkeypatch.setattr(data_fetcher, 'seeded_symbols', set())
+    monkeypatch.setattr(checkpoint, 'session_now', lambda: restart_time)
+    assert checkpoint.restore_checkpoint(path, reconcile=False)
+    assert 'INFY' not in data_fetcher.seeded_symbols
+
+    kite.end = restart_time
+    monkeypatch.setattr(data_fetcher, 'session_now', lambda: restart_time)
+    data_fetcher.seed_bars('INFY', 1)
+    assert kite.requests[-1] == snapshot_time.replace(minute=0, second=0).strftime('%Y-%m-%d %H:%M:%S')
+    builder = data_fetcher.get_bar_builder()
+    builder.close_elapsed(restart_time + timedelta(minutes=15))
+    one = builder.bars('INFY', '1m')[:, TS]
+    assert (one[1:] - one[:-1] == 60).all()
+    assert datetime.fromtimestamp(one[-1]) == restart_time.replace(second=0)
@@ -0,0 +1,11 @@
+import time
+from portfolio import PositionLedger
+
+def test_expire_pending_drops_only_old_orders():
+    ledger = PositionLedger()
+    ledger.record_order('old', 'INFY', 'buy', 10)
+    ledger.record_order('new', 'TCS', 'sell', 5)
+    ledger.pending_orders['old']['placed_at'] = time.time() - 600
+    assert ledger.expire_pending(300) == 1
+    assert list(ledger.state()['pending_orders']) == ['new']
+    assert ledger.positions == {'INFY': 10, 'TCS': -5}
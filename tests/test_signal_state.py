@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import numpy as np
+import main
+from signal_state import SignalTracker
+
+SYMBOLS = ['INFY', 'TCS', 'HDFCBANK']
+START = datetime(2026, 1, 5, 10, 0)
+
+async def _no_alert(*args, **kwargs):
+    return None
+
+async def _approve(signal, explanation):
+    return True
+
+def _buy_signals(ticks, global_ctx, strategies):
+    signals = [{'side': 'buy', 'size': 0.8, 'confidence': 0.9, 'symbol': s, 'strategy': 'drl'} for s in SYMBOLS]
+    return signals, np.zeros((len(signals), 3))
+
+def _run_ticks(monkeypatch, tracker, risk_check, seconds=(0, 1, 2)):
+    monkeypatch.setattr(main, 'fetch_nifty100_realtime', lambda: {})
+    monkeypatch.setattr(main, 'build_signals', _buy_signals)
+    monkeypatch.setattr(main, 'risk_check', risk_check)
+    monkeypatch.setattr(main, 'explain_decision', lambda signal, features: '')
+    monkeypatch.setattr(main, 'log_trade', lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, 'record', lambda *args: None)
+    monkeypatch.setattr(main, 'send_alert', _no_alert)
+    emitted = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for second in seconds:
+            monkeypatch.setattr(main, 'session_now', lambda: START + timedelta(seconds=second))
+            futures = main.run_tick(executor, tracker=tracker, fetch_context=dict, approve=_approve)
+            wait(futures)
+            emitted.append(len(futures))
+    return emitted
+
+def test_rejected_signal_stays_quiet_until_cooldown(monkeypatch):
+    tracker = SignalTracker(cooldown=60.0)
+    emitted = _run_ticks(monkeypatch, tracker, lambda signal, ctx: (False, 'trading_hours'), seconds=(0, 1, 2, 59, 60, 61))
+    assert emitted == [3, 0, 0, 0, 3, 0]
+    assert tracker.positions() == {}
+
+def test_rejected_then_approved_signal_latches(monkeypatch):
+    tracker = SignalTracker(cooldown=60.0)
+    verdicts = iter([(False, 'sector_rank')] * 3 + [(True, None)] * 3)
+    monkeypatch.setattr(main, 'execute_trade', lambda signal: f"order-{signal['symbol']}")
+    emitted = _run_ticks(monkeypatch, tracker, lambda signal, ctx: next(verdicts), seconds=(0, 30, 60, 61, 120, 180))
+    assert emitted == [3, 0, 3, 0, 0, 0]
+    assert tracker.positions() == {s: 'buy' for s in SYMBOLS}
+
+def test_failed_order_releases_symbol_after_cooldown(monkeypatch):
+    tracker = SignalTracker(cooldown=60.0)
+    monkeypatch.setattr(main, 'execute_trade', lambda signal: None)
+    emitted = _run_ticks(monkeypatch, tracker, lambda signal, ctx: (True, None), seconds=(0, 1, 60))
+    assert emitted == [3, 0, 3]
+    assert tracker.positions() == {}
+
+def test_traded_signal_stays_latched(monkeypatch):
+    tracker = SignalTracker(cooldown=60.0)
+    monkeypatch.setattr(main, 'execute_trade', lambda signal: f"order-{signal['symbol']}")
+    emitted = _run_ticks(monkeypatch, tracker, lambda signal, ctx: (True, None), seconds=(0, 1, 120))
+    assert emitted == [3, 0, 0]
+    assert tracker.positions() == {s: 'buy' for s in SYMBOLS}
+
+def test_deferred_state_survives_checkpoint():
+    tracker = SignalTracker(cooldown=60.0)
+    tracker.filter([{'side': 'buy', 'confidence': 0.9, 'symbol': 'INFY'}], np.zeros((1, 3)), now=0.0)
+    tracker.defer('INFY')
+    restored = SignalTracker(cooldown=60.0)
+    restored.restore(tracker.state())
+    signals, _ = restored.filter([{'side': 'buy', 'confidence': 0.9, 'symbol': 'INFY'}], np.zeros((1, 3)), now=60.0)
+    assert len(signals) == 1
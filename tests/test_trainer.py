@@ -0,0 +1,29 @@
+import json
+import numpy as np
+import pandas as pd
+import torch
+from ai_trader.trainer import export_model, train
+from ai_trader.training_env import build_training_data
+from strategy_engine import FEATURE_NAMES
+
+def _history():
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range('2026-01-05 09:15', '2026-01-05 15:29', freq='1min')
+    return pd.concat([pd.DataFrame({'timestamp': timestamps, 'symbol': symbol, 'volume': 10.0, 'rsi': 50.0,
+                                    'close': 100 + rng.standard_normal(len(timestamps)).cumsum()})
+                      for symbol in ('INFY', 'TCS')])
+
+def test_features_missing_from_history_are_masked_in_export(tmp_path):
+    data = build_training_data(_history())
+    vix = FEATURE_NAMES.index('india_vix')
+    assert data['feature_mask'][vix] == 0 and data['feature_mask'][FEATURE_NAMES.index('rsi')] == 1
+    model = train(data, data['day_bounds'], n_envs=8, rollout=4, updates=1)
+    path = str(tmp_path / 'policy.pt')
+    export_model(model, path)
+    extra = {'metadata.json': ''}
+    policy = torch.jit.load(path, _extra_files=extra)
+    assert 'india_vix' in json.loads(extra['metadata.json'])['masked_features']
+    rows = torch.zeros(2, len(FEATURE_NAMES))
+    rows[1, vix] = 15.0
+    logits = policy(rows)
+    assert torch.equal(logits[0], logits[1])
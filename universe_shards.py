@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import time
+import numpy as np
+from kite_api_config import install_rate_limiters, shared_rate_limiters
+from strategy_engine import FEATURE_NAMES
+from utils import get_excluded_stocks, send_alert
+
+def partition(symbols, shards):
+    symbols = sorted(symbols)
+    return [symbols[i::shards] for i in range(shards)]
+
+def _shard_main(index, symbols, conn, limiters):
+    import utils
+    import data_fetcher
+    import session_recorder
+    from bootstrap import bootstrap
+    from checkpoint import checkpoint_path, restore_checkpoint, save_checkpoint
+    from strategy_engine import build_signals
+    from strategies import build_strategy_set
+    from profiler import install_signal_handler
+    utils.configure_logging()
+    install_signal_handler()
+    install_rate_limiters(limiters)
+    data_fetcher.bar_store_suffix = f'.shard{index}'
+    session_recorder.recording_suffix = f'.shard{index}'
+    snapshot = checkpoint_path(f'.shard{index}')
+    try:
+        restore_checkpoint(snapshot)
+        drl_trader = bootstrap(['config', 'sector_index', 'drl_trader'])['drl_trader']
+        if drl_trader is None:
+            raise RuntimeError("DRL trader failed to start")
+        strategies = build_strategy_set(drl_trader)
+        # The first fetch seeds any symbol the checkpoint did not cover, which is too slow for a tick deadline.
+        data_fetcher.fetch_nifty100_realtime(symbols)
+        conn.send(('ready', len(symbols)))
+    except Exception as e:
+        conn.send(('failed', str(e)))
+        return
+    last_flush = time.monotonic()
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'tick':
+                _, global_ctx, excluded = message
+                with utils.excluded_stocks_lock:
+                    utils.excluded_stocks = set(excluded)
+                try:
+                    ticks = data_fetcher.fetch_nifty100_realtime(symbols)
+                    signals, features = build_signals(ticks, global_ctx, strategies)
+                    conn.send(('ok', signals, features))
+                except Exception as e:
+                    logging.error(f"Shard {index} tick error: {e}")
+                    conn.send(('error', str(e)))
+                if time.monotonic() - last_flush >= 60:
+                    data_fetcher.flush_bar_store()
+                    session_recorder.flush_recording()
+                    save_checkpoint(snapshot, include_portfolio=False)
+                    last_flush = time.monotonic()
+            elif message[0] == 'stop':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        data_fetcher.flush_bar_store()
+        session_recorder.close_recording()
+        save_checkpoint(snapshot, include_portfolio=False)
+
+class _Shard:
+    def __init__(self, index, symbols):
+        self.index = index
+        self.symbols = symbols
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.failures = 0
+        self.next_spawn = 0.0
+        self.started_at = 0.0
+
+class ShardCoordinator:
+    """Runs the fetch/feature/decision pipeline for slices of the universe in worker processes.
+
+    Quote and historical requests from every shard draw on the same shared rate limiters,
+    and the signals come back to this process, where portfolio risk checks and order
+    placement stay single-threaded per tick.
+    """
+
+    def __init__(self, symbols, shards=2, timeout=10.0, startup_timeout=600.0, retry_interval=30.0):
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.retry_interval = retry_interval
+        self._context = mp.get_context('spawn')
+        self.limiters = shared_rate_limiters(self._context)
+        install_rate_limiters(self.limiters)
+        self._shards = [_Shard(i, part) for i, part in enumerate(partition(symbols, shards)) if part]
+
+    def start(self):
+        for shard in self._shards:
+            self._spawn(shard)
+        deadline = time.monotonic() + self.startup_timeout
+        for shard in self._shards:
+            self._await_ready(shard, max(0.0, deadline - time.monotonic()))
+        if not any(shard.ready for shard in self._shards):
+            raise RuntimeError("No universe shard could start")
+
+    def run_tick(self, global_ctx):
+        excluded = sorted(get_excluded_stocks())
+        for shard in self._shards:
+            if shard.process is None and time.monotonic() >= shard.next_spawn:
+                self._spawn(shard)
+            if not shard.ready and shard.process is not None:
+                self._await_ready(shard, 0.0)
+        sent = []
+        for shard in self._shards:
+            if not shard.ready:
+                continue
+            try:
+                shard.conn.send(('tick', global_ctx, excluded))
+                sent.append(shard)
+            except (OSError, BrokenPipeError) as e:
+                self._fail(shard, f"send failed: {e}")
+        deadline = time.monotonic() + self.timeout
+        signals, features = [], []
+        for shard in sent:
+            try:
+                if not shard.conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"no result within {self.timeout}s")
+                status, *payload = shard.conn.recv()
+            except Exception as e:
+                # A late reply would desynchronise the pipe, so a slow shard is restarted.
+                self._fail(shard, str(e))
+                continue
+            if status == 'ok':
+                signals.extend(payload[0])
+                if len(payload[1]):
+                    features.append(payload[1])
+            else:
+                logging.error(f"Universe shard {shard.index} failed this tick: {payload[0]}")
+        matrix = np.vstack(features) if features else np.empty((0, len(FEATURE_NAMES)))
+        return signals, matrix
+
+    def close(self):
+        for shard in self._shards:
+            self._terminate(shard, graceful=True)
+
+    def _spawn(self, shard):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_shard_main,
+            args=(shard.index, shard.symbols, child_conn, self.limiters),
+            name=f'universe-shard-{shard.index}'
+        )
+        process.start()
+        child_conn.close()
+        shard.process, shard.conn, shard.ready = process, parent_conn, False
+        shard.started_at = time.monotonic()
+
+    def _await_ready(self, shard, timeout):
+        try:
+            if not shard.conn.poll(timeout):
+                if time.monotonic() - shard.started_at > self.startup_timeout:
+                    self._fail(shard, f"no response within {self.startup_timeout}s")
+                return
+            status, payload = shard.conn.recv()
+        except EOFError:
+            status, payload = 'failed', 'shard exited during startup'
+        if status == 'ready':
+            shard.ready = True
+            shard.failures = 0
+            logging.info(f"Universe shard {shard.index} (pid {shard.process.pid}) serving {payload} symbols")
+        else:
+            self._fail(shard, payload)
+
+    def _fail(self, shard, reason):
+        self._terminate(shard)
+        shard.failures += 1
+        shard.next_spawn = time.monotonic() + min(600.0, self.retry_interval * 2 ** (shard.failures - 1))
+        logging.error(f"Universe shard {shard.index} failed ({reason}); {len(shard.symbols)} symbols idle until restart")
+        asyncio.run(send_alert(f"Universe shard {shard.index} failed: {reason}", error=True))
+
+    def _terminate(self, shard, graceful=False):
+        if shard.process is None:
+            shard.ready = False
+            return
+        if graceful and shard.process.is_alive():
+            try:
+                shard.conn.send(('stop',))
+                shard.process.join(5.0)
+            except (OSError, BrokenPipeError):
+                pass
+        if shard.process.is_alive():
+            shard.process.kill()
+            shard.process.join(1.0)
+        shard.conn.close()
+        shard.process = shard.conn = None
+        shard.ready = False
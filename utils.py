@@ -1,30 +1,61 @@
-from cryptography.fernet import Fernet
 import os
 import json
 import logging
-from telethon import TelegramClient, events
-from data_fetcher import get_nifty100_symbols
+from functools import lru_cache
+import yaml
 from dotenv import load_dotenv
 import threading
 import asyncio
-from kite_api_config import kite
+from datetime import datetime
+from kite_api_config import get_kite
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO, filename='logs/daily_log.csv', format='%(asctime)s,%(levelname)s,%(message)s')
 
-key_file = 'logs/encryption_key.key'
-if os.path.exists(key_file):
-    with open(key_file, 'rb') as f:
-        key = f.read()
-else:
+LOG_FILE = 'logs/daily_log.csv'
+CONFIG_FILE = 'config.yaml'
+
+def configure_logging():
     os.makedirs('logs', exist_ok=True)
-    key = Fernet.generate_key()
-    with open(key_file, 'wb') as f:
-        f.write(key)
-cipher = Fernet(key)
+    logging.basicConfig(level=logging.INFO, filename=LOG_FILE, format='%(asctime)s,%(levelname)s,%(message)s')
+
+_session_clock = None
+
+def session_now():
+    """The time trading logic runs at: the wall clock live, the recorded session's clock on replay."""
+    return _session_clock() if _session_clock else datetime.now()
+
+def set_session_clock(clock):
+    global _session_clock
+    _session_clock = clock
 
-excluded_stocks_lock = threading.Lock()
-excluded_stocks = set()
+@lru_cache(maxsize=None)
+def get_config(path=CONFIG_FILE):
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+key_file = 'logs/encryption_key.key'
+_cipher = None
+_cipher_lock = threading.Lock()
+
+def get_cipher():
+    global _cipher
+    if _cipher is None:
+        with _cipher_lock:
+            if _cipher is None:
+                from cryptography.fernet import Fernet
+                if os.path.exists(key_file):
+                    with open(key_file, 'rb') as f:
+                        key = f.read()
+                else:
+                    os.makedirs('logs', exist_ok=True)
+                    key = Fernet.generate_key()
+                    with open(key_file, 'wb') as f:
+                        f.write(key)
+                _cipher = Fernet(key)
+    return _cipher
+
+excluded_stocks_lock = threading.RLock()
+excluded_stocks = None
 
 EXCLUDED_STOCKS_FILE = 'data/excluded_stocks.json'
 def load_excluded_stocks():
@@ -33,7 +64,7 @@ def load_excluded_stocks():
             if os.path.exists(EXCLUDED_STOCKS_FILE):
                 with open(EXCLUDED_STOCKS_FILE, 'rb') as f:
                     encrypted_data = f.read()
-                decrypted_data = cipher.decrypt(encrypted_data).decode()
+                decrypted_data = get_cipher().decrypt(encrypted_data).decode()
                 data = json.loads(decrypted_data)
                 return set(data.get('excluded_stocks', []))
             return set()
@@ -47,7 +78,7 @@ def save_excluded_stocks(excluded_stocks):
         try:
             os.makedirs('data', exist_ok=True)
             data = {"excluded_stocks": list(excluded_stocks)}
-            encrypted_data = cipher.encrypt(json.dumps(data).encode())
+            encrypted_data = get_cipher().encrypt(json.dumps(data).encode())
             with open(EXCLUDED_STOCKS_FILE, 'wb') as f:
                 f.write(encrypted_data)
             logging.info("Updated excluded stocks")
@@ -55,24 +86,43 @@ def save_excluded_stocks(excluded_stocks):
             logging.error(f"Error saving excluded stocks: {e}")
             asyncio.run(send_alert(f"Error saving excluded stocks: {e}", error=True))
 
-excluded_stocks = load_excluded_stocks()
+def get_excluded_stocks():
+    global excluded_stocks
+    if excluded_stocks is None:
+        with excluded_stocks_lock:
+            if excluded_stocks is None:
+                excluded_stocks = load_excluded_stocks()
+    return excluded_stocks
+
+_client = None
+_client_lock = threading.Lock()
 
-TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID')
-TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH')
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-client = TelegramClient('bot', TELEGRAM_API_ID, TELEGRAM_API_HASH).start(bot_token=TELEGRAM_TOKEN)
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from telethon import TelegramClient, events
+                client = TelegramClient('bot', os.getenv('TELEGRAM_API_ID'), os.getenv('TELEGRAM_API_HASH'))
+                client.add_event_handler(exclude_command, events.NewMessage(pattern='/exclude'))
+                client.add_event_handler(include_command, events.NewMessage(pattern='/include'))
+                client.add_event_handler(list_exclusions_command, events.NewMessage(pattern='/list_exclusions'))
+                client.add_event_handler(profile_command, events.NewMessage(pattern='/profile'))
+                _client = client.start(bot_token=os.getenv('TELEGRAM_TOKEN'))
+    return _client
 
-@client.on(events.NewMessage(pattern='/exclude'))
 async def exclude_command(event):
     try:
+        from data_fetcher import get_universe_symbols
         stocks = event.message.text.split()[1].upper().split(',') if len(event.message.text.split()) > 1 else []
-        valid_symbols = get_nifty100_symbols()
+        valid_symbols = get_universe_symbols()
         invalid_stocks = [s for s in stocks if s not in valid_symbols]
         if invalid_stocks:
-            await event.reply(f"Invalid stocks (not in NIFTY 100): {', '.join(invalid_stocks)}")
+            index_name = get_config().get('universe', {}).get('index', 'NIFTY 100')
+            await event.reply(f"Invalid stocks (not in {index_name}): {', '.join(invalid_stocks)}")
             return
         with excluded_stocks_lock:
-            global excluded_stocks
+            excluded_stocks = get_excluded_stocks()
             excluded_stocks.update(stocks)
             save_excluded_stocks(excluded_stocks)
         logging.info(f"Excluded stocks: {stocks} by user {event.sender_id}")
@@ -82,12 +132,11 @@ async def exclude_command(event):
         await send_alert(f"Error in exclude command: {e}", error=True)
         await event.reply("Error processing /exclude command")
 
-@client.on(events.NewMessage(pattern='/include'))
 async def include_command(event):
     try:
         stocks = event.message.text.split()[1].upper().split(',') if len(event.message.text.split()) > 1 else []
         with excluded_stocks_lock:
-            global excluded_stocks
+            excluded_stocks = get_excluded_stocks()
             removed = [s for s in stocks if s in excluded_stocks]
             excluded_stocks.difference_update(stocks)
             save_excluded_stocks(excluded_stocks)
@@ -98,10 +147,10 @@ async def include_command(event):
         await send_alert(f"Error in include command: {e}", error=True)
         await event.reply("Error processing /include command")
 
-@client.on(events.NewMessage(pattern='/list_exclusions'))
 async def list_exclusions_command(event):
     try:
         with excluded_stocks_lock:
+            excluded_stocks = get_excluded_stocks()
             if excluded_stocks:
                 await event.reply(f"Excluded stocks: {', '.join(sorted(excluded_stocks))}")
             else:
@@ -111,16 +160,47 @@ async def list_exclusions_command(event):
         await send_alert(f"Error in list_exclusions command: {e}", error=True)
         await event.reply("Error processing /list_exclusions command")
 
+async def profile_command(event):
+    try:
+        from profiler import get_profiler, profile_window
+        args = event.message.text.split()[1:]
+        profiler = get_profiler()
+        if args and args[0].lower() == 'stop':
+            await event.reply("Stopping profiler" if profiler.stop() else "Profiler is not running")
+            return
+        seconds = profile_window(args[0] if args else None)
+        loop = asyncio.get_running_loop()
+        on_complete = lambda result: asyncio.run_coroutine_threadsafe(post_profile(event, result), loop)
+        if profiler.start(seconds, on_complete=on_complete):
+            logging.info(f"Profiling for {seconds:.0f}s requested by user {event.sender_id}")
+            await event.reply(f"Profiling all threads for {seconds:.0f}s")
+        else:
+            await event.reply("Profiler already running; send /profile stop to end it early")
+    except ValueError:
+        await event.reply("Usage: /profile [seconds|stop]")
+    except Exception as e:
+        logging.error(f"Error in profile command: {e}")
+        await send_alert(f"Error in profile command: {e}", error=True)
+        await event.reply("Error processing /profile command")
+
+async def post_profile(event, result):
+    try:
+        await event.reply(result['summary'][:4000])
+        await event.client.send_file(event.chat_id, result['collapsed'])
+    except Exception as e:
+        logging.error(f"Error posting profile: {e}")
+
 def start_telegram_bot():
     try:
-        client.run_until_disconnected()
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        get_client().run_until_disconnected()
     except Exception as e:
         logging.error(f"Telegram bot error: {e}")
         asyncio.run(send_alert(f"Telegram bot error: {e}", error=True))
 
 def get_portfolio_pnl():
     try:
-        positions = kite.positions()
+        positions = get_kite().positions()
         return sum(pos['pnl'] for pos in positions['day'])
     except Exception as e:
         logging.error(f"Error calculating P&L: {e}")
@@ -138,24 +218,39 @@ def explain_decision(signal, features):
                 f"VIX: {vix:.1f}, P&L: {portfolio_pnl:.2f}")
     return f"AI HOLD: No edge | RSI: {rsi:.1f}, P&L: {portfolio_pnl:.2f}"
 
-def encrypt_log(data, filename='logs/encrypted_log.csv'):
+def log_trade(signal, explanation, outcome='executed', reason=None, **fields):
     try:
-        encrypted = cipher.encrypt(data.encode())
-        with open(filename, 'wb') as f:
-            f.write(encrypted)
+        from journal import get_journal
+        get_journal().record(
+            event='decision',
+            symbol=signal['symbol'],
+            side=signal['side'],
+            confidence=signal['confidence'],
+            size=signal.get('size'),
+            price=signal.get('price'),
+            sector=signal.get('sector'),
+            strategy=signal.get('strategy'),
+            outcome=outcome,
+            reason=reason,
+            explanation=explanation,
+            **fields
+        )
     except Exception as e:
-        logging.error(f"Error encrypting log: {e}")
-        asyncio.run(send_alert(f"Error encrypting log: {e}", error=True))
-
-def log_trade(signal, explanation):
-    data = f"{signal},{explanation}\n"
-    encrypt_log(data)
-    logging.info(f"Trade logged: {signal['side']}, {explanation}")
+        # The plain log keeps the decision when the journal cannot.
+        logging.error(f"Error journaling {outcome} {signal['side']} for {signal['symbol']} "
+                      f"(reason {reason}, {fields}): {e}; {explanation}")
+        asyncio.run(send_alert(f"Error journaling decision for {signal['symbol']}: {e}", error=True))
+        return
+    if outcome == 'executed':
+        logging.info(f"Trade logged: {signal['side']}, {explanation}")
 
 async def send_alert(message, error=False):
     try:
+        if _client is None:
+            logging.warning(f"Telegram client not started, alert not sent: {message}")
+            return
         chat_id = os.getenv('TELEGRAM_CHAT_ID')
         prefix = "Error Alert: " if error else ""
-        await client.send_message(chat_id, f"{prefix}{message}")
+        await _client.send_message(chat_id, f"{prefix}{message}")
     except Exception as e:
         logging.error(f"Error sending Telegram alert: {e}")